@@ -1,7 +1,12 @@
 from .log import log
+from .request_preparer import RequestPreparer
+from .client_monitor import ClientMonitor
 from .llm_performance_tester import LLMPerformanceTester
-from .analysis import Analysis
+from .analysis import Analysis, AnalysisAccumulator
 
 __all__ = ["log", 
+           "RequestPreparer",
+           "ClientMonitor",
            "LLMPerformanceTester",
-           "Analysis"]
\ No newline at end of file
+           "Analysis",
+           "AnalysisAccumulator"]
\ No newline at end of file
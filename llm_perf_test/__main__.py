@@ -1,14 +1,107 @@
 import asyncio
+import contextlib
 import os
+from typing import Optional
+
 import aiohttp
 
-from llm_perf_test import Analysis, LLMPerformanceTester, log
+from llm_perf_test import AnalysisAccumulator, LLMPerformanceTester, log
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.distributed import Agent, Coordinator
 from llm_perf_test.load_datasets import LoadPromptsFromCsv, LoadPromptsFromRawPrompts
 from llm_perf_test.models import config
+from llm_perf_test.token_counters import ApproximateTokenCounter, TiktokenTokenCounter
+from llm_perf_test.writers import CsvResultWriter, ParquetResultWriter, ResultWriter
+
+
+def open_result_writer(name: str) -> Optional[ResultWriter]:
+    """Open the per-request results file for a test phase, or None when disabled."""
+    if config.result_format == "none" or not config.result_dir:
+        return None
+    path = os.path.join(config.result_dir, f"{name}.{config.result_format}")
+    writer = ParquetResultWriter(path) if config.result_format == "parquet" else CsvResultWriter(path)
+    log(f"Streaming per-request results to {path}")
+    return writer
+
+
+def open_checkpoint(phase: str, prompts: list[str]) -> Checkpoint:
+    """Create the checkpoint for a test phase, restoring completed results when resuming."""
+    checkpoint = Checkpoint(config.result_dir, phase, total=len(prompts),
+                            interval_seconds=config.checkpoint_interval_seconds)
+    if config.resume:
+        checkpoint.load(prompts)
+    else:
+        checkpoint.reset()
+    return checkpoint
+
+
+def create_tester() -> LLMPerformanceTester:
+    """Create the tester from the loaded configuration."""
+    return LLMPerformanceTester(
+        base_url=config.base_url,
+        api_key=config.api_key,
+        model=config.model,
+        result_dir=config.result_dir,
+        api_version=config.api_version,
+        verify_ssl=config.verify_ssl,
+        request_cache_max_bytes=config.request_cache_max_bytes,
+        monitor_interval=config.monitor_interval_seconds,
+        loop_lag_warn_ms=config.client_loop_lag_warn_ms,
+        cpu_warn_percent=config.client_cpu_warn_percent,
+        connect_timeout=config.connect_timeout,
+        first_token_timeout=config.first_token_timeout,
+        chunk_idle_timeout=config.chunk_idle_timeout,
+        hedge_delay_seconds=config.hedge_delay_seconds,
+        hedge_percentile=config.hedge_percentile,
+        hedge_drain_loser=config.hedge_drain_loser,
+        token_counter=TiktokenTokenCounter(config.model) if config.tokenizer == "tiktoken" else ApproximateTokenCounter(),
+        token_cache_path=config.token_cache_path
+    )
+
+
+async def run_coordinator(test_prompts: list[str]) -> None:
+    """Drive agents on other hosts/processes and report a single merged analysis."""
+    coordinator = Coordinator(host=config.coordinator_host,
+                              port=config.coordinator_port,
+                              expected_agents=config.agents,
+                              start_delay=config.start_delay_seconds,
+                              progress_interval=config.progress_interval_seconds,
+                              join_timeout=config.join_timeout_seconds)
+    # Per-request rows cross the network only when a results file is wanted; the analysis needs just summaries
+    writer = open_result_writer("requests_distributed") if config.agent_upload_rows else None
+    with (writer or contextlib.nullcontext()):
+        try:
+            analysis = await coordinator.run(test_prompts * 2,  # same workload as the local concurrent test
+                                             concurrent=max(config.concurrent, 1),
+                                             request_timeout=config.request_timeout,
+                                             use_streaming=config.use_streaming,
+                                             result_writer=writer,
+                                             top_n=config.report_top_n)
+        except TimeoutError as e:
+            log(f"Distributed test aborted: {e}", "error")
+            return
+    if not analysis:
+        log("No results received from agents.", "warning")
+        return
+    log(f"Distributed Test Results:{analysis}")
+    if config.output_markdown_path:
+        base, ext = os.path.splitext(config.output_markdown_path)
+        distributed_path = f"{base}_distributed{ext}"
+        with open(distributed_path, "w", encoding='utf-8') as f:
+            f.write(analysis.to_markdown())
+        log(f"Markdown saved to {distributed_path}")
 
 
 async def main():
     """Main function to run the performance tests."""
+    if config.mode == "agent":
+        agent = Agent(create_tester(),
+                      host=config.coordinator_host,
+                      port=config.coordinator_port,
+                      progress_interval=config.progress_interval_seconds)
+        await agent.run()
+        return
+
     dir_path = os.path.join(config.test_dataset_dir)
     loader = (LoadPromptsFromRawPrompts(dir_path) if not config.use_common_prompt else LoadPromptsFromCsv(dir_path))
 
@@ -22,49 +115,67 @@ async def main():
 
     log(f"Loaded {len(test_prompts)} prompts for testing.")
 
+    if config.mode == "coordinator":
+        await run_coordinator(test_prompts)
+        return
+
     # Initialize tester
-    tester = LLMPerformanceTester(
-        base_url=config.base_url,
-        api_key=config.api_key,
-        model=config.model,
-        result_dir=config.result_dir,
-        api_version=config.api_version,
-        verify_ssl=config.verify_ssl
-    )
+    tester = create_tester()
 
     log("Starting LLM Performance Test...")
     log(f"Endpoint: {config.base_url}")
     log(f"Model: {config.model}")
     log(f"SSL Verification: {config.verify_ssl}")
     log(f"Using Streaming: {config.use_streaming}")
+    if tester.hedging_enabled:
+        log(f"Hedging: after {config.hedge_percentile or config.hedge_delay_seconds}"
+            f"{'th percentile' if config.hedge_percentile else 's'}")
     log("-" * 50)
 
     # Test 1: Sequential Requests
     log("Test 1: Sequential Requests")
-    results = []
-    for i, prompt in enumerate(test_prompts):
-        log(f"  Request {i + 1}/{len(test_prompts)}...")
-        log(f"    Prompt: {prompt.replace('\n', ' ')[:30]}...")
-        try:
-            # Create SSL context and connector with SSL verification settings
-            ssl_context = tester.get_ssl_context()
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            timeout = aiohttp.ClientTimeout(total=config.request_timeout)
-            async with aiohttp.ClientSession(connector=connector, timeout=timeout,) as session:
-                result = await tester.single_request(session, prompt, use_streaming=config.use_streaming)
-                results.append(result)
-                log(f"    ✓ {result.tokens_per_second:.2f} tokens/sec")
-                if config.request_delay_seconds > 0:
-                    log(f"    ⏱ Sleeping {config.request_delay_seconds} seconds before next request...")
-                    await asyncio.sleep(config.request_delay_seconds)
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            log(f"    ✗ Request Error: {str(e)}","error")
+    cache_start = tester.request_preparer.stats.model_copy()
+    with (open_result_writer("requests") or contextlib.nullcontext()) as writer, \
+            open_checkpoint("sequential", test_prompts) as checkpoint:
+        accumulator = AnalysisAccumulator(top_n=config.report_top_n)
+        for _, result in checkpoint.restored(test_prompts):
+            if writer:
+                writer.write(result)
+            accumulator.add(result)
+        async with tester.client_monitor() as monitor, checkpoint:
+            for i, prompt in enumerate(test_prompts):
+                if i in checkpoint.completed:
+                    continue
+                log(f"  Request {i + 1}/{len(test_prompts)}...")
+                log(f"    Prompt: {prompt.replace('\n', ' ')[:30]}...")
+                try:
+                    # Create SSL context and connector with SSL verification settings
+                    ssl_context = tester.get_ssl_context()
+                    connector = aiohttp.TCPConnector(ssl=ssl_context)
+                    timeout = tester.client_timeout(config.request_timeout)
+                    request = tester.hedged_request if tester.hedging_enabled else tester.single_request
+                    async with tester.create_session(connector, timeout) as session:
+                        result = await request(session, prompt, use_streaming=config.use_streaming)
+                        checkpoint.record(i, prompt, result)
+                        if writer:
+                            writer.write(result)
+                        accumulator.add(result)
+                        if result.status == "ok":
+                            log(f"    ✓ {result.tokens_per_second:.2f} tokens/sec")
+                        else:
+                            log(f"    ✗ Stalled waiting for {result.stall_phase.replace('_', ' ')}", "warning")
+                        if config.request_delay_seconds > 0:
+                            log(f"    ⏱ Sleeping {config.request_delay_seconds} seconds before next request...")
+                            await asyncio.sleep(config.request_delay_seconds)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    log(f"    ✗ Request Error: {str(e)}","error")
+    tester.prompt_token_counter.save()
 
-    if results:
-        analysis = Analysis.from_results(results)
+    analysis = accumulator.build(request_cache=tester.request_preparer.stats.since(cache_start),
+                                 client_health=monitor.health)
+    if analysis:
         log(f"Sequential Test Results:{analysis}")
         md = analysis.to_markdown()
-        log(f"Markdown Output:\n{md}")
         if config.output_markdown_path:
             with open(config.output_markdown_path, "w", encoding='utf-8') as f:
                 f.write(md)
@@ -73,18 +184,26 @@ async def main():
         # Test 2: Concurrent requests
         log(f"Test 2: Concurrent Requests ({config.concurrent})")
         try:
-            concurrent_results = await tester.concurrent_test(
-                test_prompts * 2,  # 2 requests total
-                concurrent_requests=config.concurrent,
-                request_timeout=config.request_timeout,
-                use_streaming=config.use_streaming
-            )
+            concurrent_prompts = test_prompts * 2  # 2 requests total
+            cache_start = tester.request_preparer.stats.model_copy()
+            accumulator = AnalysisAccumulator(top_n=config.report_top_n)
+            with (open_result_writer("requests_concurrent") or contextlib.nullcontext()) as writer, \
+                    open_checkpoint("concurrent", concurrent_prompts) as checkpoint:
+                await tester.concurrent_test(
+                    concurrent_prompts,
+                    concurrent_requests=config.concurrent,
+                    request_timeout=config.request_timeout,
+                    use_streaming=config.use_streaming,
+                    result_writer=writer,
+                    checkpoint=checkpoint,
+                    accumulator=accumulator
+                )
             
-            if concurrent_results:
-                concurrent_analysis = Analysis.from_results(concurrent_results)
+            concurrent_analysis = accumulator.build(request_cache=tester.request_preparer.stats.since(cache_start),
+                                                    client_health=tester.client_health)
+            if concurrent_analysis:
                 log(f"Concurrent Test Results:{concurrent_analysis}")
                 md = concurrent_analysis.to_markdown()
-                log(f"Markdown Output:\n{md}")
                 if config.output_markdown_path:
                     base, ext = os.path.splitext(config.output_markdown_path)
                     concurrent_path = f"{base}_concurrent{ext}"
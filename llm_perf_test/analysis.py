@@ -1,104 +1,316 @@
-from statistics import mean, median, stdev
-from typing import List, Optional
+import heapq
+import math
+from statistics import median
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
+from llm_perf_test.checkpoint import Checkpoint
 from llm_perf_test.models import (
     config,
+    ClientHealth,
+    DistributedRun,
+    HedgingStats,
+    LatencyHistogram,
     PerformanceMetrics,
+    RequestCacheStats,
     Summary,
     TokensPerSecond,
     ResponseTimes,
     TimeToFirstToken
 )
 
-class Analysis(BaseModel):
-    """Analysis of performance test results."""
-    summary: Summary
-    tokens_per_second: TokensPerSecond
-    response_times: ResponseTimes
-    time_to_first_token: TimeToFirstToken
-    results: Optional[List[PerformanceMetrics]] = None  # Optional, store individual results
+
+class _RunningStats:
+    """Count, mean, sample standard deviation, min, max and median of a stream of values"""
+
+    # Medians are exact up to this many values, then come from the histogram
+    exact_limit = 10_000
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+        self._values: Optional[List[float]] = []
+        self._histogram = LatencyHistogram(growth=1.01)
+
+    def add(self, value: float) -> None:
+        # Welford's online update
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._histogram.record(value)
+        if self._values is not None:
+            self._values.append(value)
+            if len(self._values) > self.exact_limit:
+                self._values = None
+
+    def merge(self, other: "_RunningStats") -> None:
+        """Combine with stats gathered elsewhere (Chan et al.'s parallel variance update)"""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._histogram.merge(other._histogram)
+        if self._values is not None and other._values is not None and count <= self.exact_limit:
+            self._values.extend(other._values)
+        else:
+            self._values = None
+
+    def state(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max, "m2": self._m2,
+                "values": self._values, "histogram": self._histogram.model_dump()}
 
     @classmethod
-    def from_results(cls, results: List[PerformanceMetrics]):
-        """Create Analysis from a list of PerformanceMetrics and configuration"""
-        tokens_per_second = [r.tokens_per_second for r in results]
-        total_times = [r.total_time for r in results]
-        completion_tokens = [r.completion_tokens for r in results]
-        time_to_first_tokens = [r.time_to_first_token for r in results]
-        
-        total_tokens_generated = sum(completion_tokens)
-        total_time_elapsed = sum(total_times)
-        total_tokens = [r.total_tokens for r in results]
-        total_tokens_sum = sum(total_tokens)
-        total_reasoning_tokens = sum(r.reasoning_tokens for r in results)
-        total_prompt_tokens = sum(r.prompt_tokens for r in results)
-
-        # Calculate summary statistics
-        summary = Summary(
-            total_requests=len(results),
-            successful_requests=len(results),
-            total_tokens=total_tokens_sum,
-            total_prompt_tokens=total_prompt_tokens,
-            total_tokens_generated=total_tokens_generated,
-            total_reasoning_tokens=total_reasoning_tokens,
-            total_time_elapsed=round(total_time_elapsed, 2),
-            average_tokens_per_request=round(mean(total_tokens), 2)
-        )
+    def from_state(cls, state: dict) -> "_RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.min, stats.max = state["count"], state["mean"], state["min"], state["max"]
+        stats._m2 = state["m2"]
+        stats._values = state["values"]
+        stats._histogram = LatencyHistogram(**state["histogram"])
+        return stats
 
-        # Calculate tokens per second statistics
-        tps_stats = TokensPerSecond(
-            mean=round(mean(tokens_per_second), 2),
-            median=round(median(tokens_per_second), 2),
-            min=round(min(tokens_per_second), 2),
-            max=round(max(tokens_per_second), 2),
-            std_dev=round(stdev(tokens_per_second) if len(tokens_per_second) > 1 else 0, 2)
-        )
+    @property
+    def median(self) -> float:
+        if self._values is not None:
+            return median(self._values) if self._values else 0.0
+        return self._histogram.median()
 
-        # Calculate response time statistics
-        rt_stats = ResponseTimes(
-            mean=round(mean(total_times), 2),
-            median=round(median(total_times), 2),
-            min=round(min(total_times), 2),
-            max=round(max(total_times), 2),
-            std_dev=round(stdev(total_times) if len(total_times) > 1 else 0, 2)
-        )
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class AnalysisAccumulator:
+    """Fold results into the aggregates of an Analysis one at a time, in memory independent of the run size"""
+
+    _counters = ("total_requests", "successful_requests", "stalled_requests", "client_counted_requests",
+                 "total_tokens", "total_prompt_tokens", "total_completion_tokens", "total_reasoning_tokens",
+                 "total_time", "total_prepare_time", "total_queue_time",
+                 "hedged_requests", "hedge_wins", "hedge_extra_tokens")
+
+    def __init__(self, top_n: int = 10, keep_results: bool = False):
+        self.top_n = top_n
+        self.results: Optional[List[PerformanceMetrics]] = [] if keep_results else None
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.stalled_requests = 0
+        self.client_counted_requests = 0
+        self.total_tokens = 0
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.total_reasoning_tokens = 0
+        self.total_time = 0.0
+        self.total_prepare_time = 0.0
+        self.total_queue_time = 0.0
+        # tokens/s, total time and TTFT; stalled requests are kept out of these unless nothing succeeded
+        self._successful = (_RunningStats(), _RunningStats(), _RunningStats())
+        self._all = (_RunningStats(), _RunningStats(), _RunningStats())
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.hedge_extra_tokens = 0
+        self._hedged_successful = False
+        self._latency_without_hedging = LatencyHistogram(growth=1.01)
+        self._latency_with_hedging = LatencyHistogram(growth=1.01)
+        self._slowest: list[tuple[float, int, PerformanceMetrics]] = []  # min-heap of the top_n slowest
+        self._offered = 0
+
+    def add(self, r: PerformanceMetrics) -> None:
+        """Add one completed (or stalled) request"""
+        self.total_requests += 1
+        self.total_tokens += r.total_tokens
+        self.total_prompt_tokens += r.prompt_tokens
+        self.total_completion_tokens += r.completion_tokens
+        self.total_reasoning_tokens += r.reasoning_tokens
+        self.total_time += r.total_time
+        self.total_prepare_time += r.prepare_time
+        self.total_queue_time += r.queue_time
+        self.stalled_requests += r.status == "stalled"
+        self.client_counted_requests += r.token_source == "client"
+        self.hedged_requests += r.hedged
+        self.hedge_wins += r.hedge_won
+        self.hedge_extra_tokens += r.hedge_extra_tokens
+
+        measured = [self._all]
+        if r.status == "ok":
+            self.successful_requests += 1
+            measured.append(self._successful)
+            self._hedged_successful |= r.hedged
+            self._latency_without_hedging.record(r.primary_time or r.total_time)
+            self._latency_with_hedging.record(r.total_time)
+        for tps, times, ttft in measured:
+            tps.add(r.tokens_per_second)
+            times.add(r.total_time)
+            ttft.add(r.time_to_first_token)
+
+        if self.results is not None:
+            self.results.append(r)
+        self._offer_slowest(r)
+
+    def _offer_slowest(self, r: PerformanceMetrics) -> None:
+        if self.top_n <= 0:
+            return
+        # Ties keep the earlier request, as heapq.nlargest does
+        self._offered += 1
+        item = (r.total_time, -self._offered, r)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, item)
+        elif item[:2] > self._slowest[0][:2]:
+            heapq.heapreplace(self._slowest, item)
+
+    def _slowest_first(self) -> List[PerformanceMetrics]:
+        return [r for _, _, r in sorted(self._slowest, key=lambda item: item[:2], reverse=True)]
+
+    def merge(self, other: "AnalysisAccumulator") -> None:
+        """Add the aggregates of another accumulator, e.g. one rebuilt from an agent's state()"""
+        for name in self._counters:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for mine, theirs in zip(self._successful + self._all, other._successful + other._all):
+            mine.merge(theirs)
+        self._hedged_successful |= other._hedged_successful
+        self._latency_without_hedging.merge(other._latency_without_hedging)
+        self._latency_with_hedging.merge(other._latency_with_hedging)
+        if self.results is not None and other.results is not None:
+            self.results.extend(other.results)
+        for r in other._slowest_first():
+            self._offer_slowest(r)
+
+    def state(self) -> dict:
+        """JSON-serializable aggregates; top-N prompts are reduced to their hashes"""
+        return {
+            **{name: getattr(self, name) for name in self._counters},
+            "top_n": self.top_n,
+            "hedged_successful": self._hedged_successful,
+            "successful": [stats.state() for stats in self._successful],
+            "all": [stats.state() for stats in self._all],
+            "latency_without_hedging": self._latency_without_hedging.model_dump(),
+            "latency_with_hedging": self._latency_with_hedging.model_dump(),
+            "slowest": [{"prompt_hash": Checkpoint.prompt_hash(r.prompt), "metrics": r.model_dump(exclude={"prompt"})}
+                        for r in self._slowest_first()]
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, prompts: Optional[Dict[str, str]] = None) -> "AnalysisAccumulator":
+        """Rebuild an accumulator from state(); ``prompts`` maps prompt hashes back to the top-N prompts"""
+        accumulator = cls(top_n=state["top_n"])
+        for name in cls._counters:
+            setattr(accumulator, name, state[name])
+        accumulator._hedged_successful = state["hedged_successful"]
+        accumulator._successful = tuple(_RunningStats.from_state(s) for s in state["successful"])
+        accumulator._all = tuple(_RunningStats.from_state(s) for s in state["all"])
+        accumulator._latency_without_hedging = LatencyHistogram(**state["latency_without_hedging"])
+        accumulator._latency_with_hedging = LatencyHistogram(**state["latency_with_hedging"])
+        for row in state["slowest"]:
+            accumulator._offer_slowest(PerformanceMetrics(**row["metrics"],
+                                                          prompt=(prompts or {}).get(row["prompt_hash"], "")))
+        return accumulator
+
+    def build(self,
+              request_cache: Optional[RequestCacheStats] = None,
+              client_health: Optional[ClientHealth] = None) -> Optional["Analysis"]:
+        """Create the Analysis of everything added so far, or None if nothing was added"""
+        if not self.total_requests:
+            return None
+        tps, times, ttft = self._successful if self.successful_requests else self._all
 
-        # Calculate time to first token statistics
-        ttft_stats = TimeToFirstToken(
-            mean=round(mean(time_to_first_tokens), 2),
-            median=round(median(time_to_first_tokens), 2),
-            min=round(min(time_to_first_tokens), 2),
-            max=round(max(time_to_first_tokens), 2)
+        summary = Summary(
+            total_requests=self.total_requests,
+            successful_requests=self.successful_requests,
+            stalled_requests=self.stalled_requests,
+            total_tokens=self.total_tokens,
+            total_prompt_tokens=self.total_prompt_tokens,
+            total_tokens_generated=self.total_completion_tokens,
+            total_reasoning_tokens=self.total_reasoning_tokens,
+            total_time_elapsed=round(self.total_time, 2),
+            average_tokens_per_request=round(self.total_tokens / self.total_requests, 2),
+            total_prepare_time=round(self.total_prepare_time, 4),
+            total_queue_time=round(self.total_queue_time, 2),
+            client_counted_requests=self.client_counted_requests
         )
 
-        return cls(
+        # Hedging: compare the tail with and without the duplicate requests
+        hedging = None
+        if self._hedged_successful:
+            without = self._latency_without_hedging.percentile(99)
+            with_hedging = self._latency_with_hedging.percentile(99)
+            hedging = HedgingStats(
+                hedged_requests=self.hedged_requests,
+                hedge_wins=self.hedge_wins,
+                p99_without_hedging=round(without, 2),
+                p99_with_hedging=round(with_hedging, 2),
+                p99_reduction_percent=round((without - with_hedging) / without * 100 if without > 0 else 0, 2),
+                extra_tokens=self.hedge_extra_tokens,
+                extra_tokens_percent=round(self.hedge_extra_tokens / self.total_tokens * 100 if self.total_tokens else 0, 2)
+            )
+
+        return Analysis(
             summary=summary,
-            tokens_per_second=tps_stats,
-            response_times=rt_stats,
-            time_to_first_token=ttft_stats,
-            results=results
+            tokens_per_second=TokensPerSecond(mean=round(tps.mean, 2), median=round(tps.median, 2), min=round(tps.min, 2),
+                                              max=round(tps.max, 2), std_dev=round(tps.std_dev, 2)),
+            response_times=ResponseTimes(mean=round(times.mean, 2), median=round(times.median, 2), min=round(times.min, 2),
+                                         max=round(times.max, 2), std_dev=round(times.std_dev, 2)),
+            time_to_first_token=TimeToFirstToken(mean=round(ttft.mean, 2), median=round(ttft.median, 2),
+                                                 min=round(ttft.min, 2), max=round(ttft.max, 2)),
+            results=list(self.results) if self.results is not None else None,
+            slowest_requests=self._slowest_first(),
+            hedging=hedging,
+            request_cache=request_cache,
+            client_health=client_health
         )
+
+
+class Analysis(BaseModel):
+    """Analysis of performance test results."""
+    summary: Summary
+    tokens_per_second: TokensPerSecond
+    response_times: ResponseTimes
+    time_to_first_token: TimeToFirstToken
+    results: Optional[List[PerformanceMetrics]] = None  # Optional, store individual results
+    slowest_requests: List[PerformanceMetrics] = []  # Top-N requests by total time, slowest first
+    hedging: Optional[HedgingStats] = None  # Optional, present when requests were hedged
+    request_cache: Optional[RequestCacheStats] = None  # Optional, request preparation cache stats
+    client_health: Optional[ClientHealth] = None  # Optional, load-generator self-monitoring
+    distributed: Optional[DistributedRun] = None  # Optional, agents and merged histograms of a distributed run
+
+    @classmethod
+    def from_results(cls,
+                     results: List[PerformanceMetrics],
+                     request_cache: Optional[RequestCacheStats] = None,
+                     client_health: Optional[ClientHealth] = None,
+                     top_n: int = 10,
+                     keep_results: bool = False):
+        """Create Analysis from a list of PerformanceMetrics; see AnalysisAccumulator to aggregate while a test runs"""
+        accumulator = AnalysisAccumulator(top_n=top_n, keep_results=keep_results)
+        for r in results:
+            accumulator.add(r)
+        return accumulator.build(request_cache=request_cache, client_health=client_health)
     
     def __print_table__(self) -> str:
-        """Print table for each result"""
+        """Print table for the slowest requests"""
         headers = ["Request ID", "Total Tokens", "Prompt Tokens", "Completion Tokens", "Reasoning Tokens", "Total Time (s)", "Tokens/Sec", "Time to First Token (s)"]
-        lines = [" | ".join(headers), "-" * 100]
-        if not self.results:
-            return "\n".join(lines)
-        for r in self.results or []:
+        lines = [f"Top {len(self.slowest_requests)} slowest requests:", " | ".join(headers), "-" * 100]
+        for r in self.slowest_requests:
             line = f"{r.request_id} | {r.total_tokens} | {r.prompt_tokens} | {r.completion_tokens} | {r.reasoning_tokens} | {r.total_time:.2f} | {r.tokens_per_second:.2f} | {r.time_to_first_token:.2f}"
             lines.append(line)
         return "\n".join(lines)
     
     def to_markdown(self) -> str:
         """
-        Return a full Markdown representation:
-        - Detailed per-request table
+        Return a Markdown report of aggregates; its size does not grow with the number of requests:
         - Summary
         - Tokens/sec stats
         - Response time stats
         - Time to first token stats
+        - Top-N slowest requests
         """
         lines: list[str] = []
 
@@ -107,20 +319,6 @@ class Analysis(BaseModel):
             lines.append(config.markdown)
             lines.append("")  # blank line
 
-        # Per-request table
-        if self.results:
-            lines.append("### Per-Request Metrics")
-            headers = ["Request ID","Prompt size(KB)","Total tokens","Prompt tokens","Completion tokens","Reasoning tokens","Total Time (s)","Tokens/Sec","TTFT (s)"]
-            lines.append("| " + " | ".join(headers) + " |")
-            lines.append("|" + "|".join(["---"] * len(headers)) + "|")
-            for r in self.results or []:
-                prompt_bytes = r.prompt.encode("utf-8")
-                prompt_size_bytes = len(prompt_bytes)
-                prompt_size_kb = round(prompt_size_bytes / 1024, 2)
-                lines.append(f"| {r.request_id} | {prompt_size_kb} | {r.total_tokens} | {r.prompt_tokens} | {r.completion_tokens} | "
-                             f"{r.reasoning_tokens} | {r.total_time:.2f} | {r.tokens_per_second:.2f} | {r.time_to_first_token:.2f} |")
-            lines.append("")
-
         # Helper to dump any dataclass as a two‑column table
         def dc_table(title: str, obj) -> list[str]:
             block = [f"### {title}", "| Metric | Value |", "|---|---|"]
@@ -132,12 +330,86 @@ class Analysis(BaseModel):
             return block
 
         lines.extend(dc_table("Summary", self.summary))
+        if self.summary.client_counted_requests:
+            lines.append(f"> Token counts for {self.summary.client_counted_requests} of {self.summary.total_requests} requests "
+                         "were computed client-side because the endpoint returned no usage (see the Token source column).")
+            lines.append("")
         lines.extend(dc_table("Tokens / Second Stats", self.tokens_per_second))
         lines.extend(dc_table("Response Time Stats (s)", self.response_times))
         lines.extend(dc_table("Time To First Token (s)", self.time_to_first_token))
+        if self.hedging:
+            lines.extend(dc_table("Hedging", self.hedging))
+        if self.request_cache:
+            lines.extend(dc_table("Request Preparation Cache", self.request_cache))
+        if self.client_health:
+            lines.extend(self._client_health_markdown())
+        if self.distributed:
+            lines.extend(self._distributed_markdown())
+
+        # Slowest requests; the full per-request table is streamed to CSV/Parquet
+        if self.slowest_requests:
+            lines.append(f"### Top {len(self.slowest_requests)} Slowest Requests")
+            headers = ["Request ID","Status","Prompt size(KB)","Token source","Total tokens","Prompt tokens","Completion tokens","Reasoning tokens","Total Time (s)","Tokens/Sec","TTFT (s)"]
+            lines.append("| " + " | ".join(headers) + " |")
+            lines.append("|" + "|".join(["---"] * len(headers)) + "|")
+            for r in self.slowest_requests:
+                prompt_size_kb = round(len(r.prompt.encode("utf-8")) / 1024, 2)
+                status = f"{r.status} ({r.stall_phase})" if r.stall_phase else r.status
+                lines.append(f"| {r.request_id} | {status} | {prompt_size_kb} | {r.token_source} | {r.total_tokens} | {r.prompt_tokens} | {r.completion_tokens} | "
+                             f"{r.reasoning_tokens} | {r.total_time:.2f} | {r.tokens_per_second:.2f} | {r.time_to_first_token:.2f} |")
+            lines.append("")
 
         return "\n".join(lines)
 
+    def _client_health_markdown(self, max_rows: int = 60) -> list[str]:
+        """Client health summary plus a time-series table downsampled to at most max_rows."""
+        health = self.client_health
+        lines = ["### Client Health"]
+        if health.client_saturated:
+            lines.append("> ⚠ **The load generator was a bottleneck during this run; latency figures are suspect.**")
+            lines.extend(f"> - {w}" for w in health.warnings)
+            lines.append("")
+        lines.extend(["| Metric | Value |", "|---|---|"])
+        for k, v in health.model_dump(exclude={"samples", "warnings"}).items():
+            lines.append(f"| {k.replace('_', ' ').title()} | {v} |")
+        lines.append("")
+
+        if health.samples:
+            step = max(1, -(-len(health.samples) // max_rows))
+            lines.append("#### Client Health Time Series")
+            headers = ["Elapsed (s)", "Loop lag (ms)", "CPU (%)", "RSS (MB)", "In flight", "Tasks"]
+            lines.append("| " + " | ".join(headers) + " |")
+            lines.append("|" + "|".join(["---"] * len(headers)) + "|")
+            for s in health.samples[::step]:
+                lines.append(f"| {s.elapsed} | {s.loop_lag_ms} | {s.cpu_percent} | {s.rss_mb} | {s.in_flight} | {s.tasks} |")
+            lines.append("")
+        return lines
+
+    def _distributed_markdown(self) -> list[str]:
+        """Per-agent table and percentiles from the merged agent histograms."""
+        run = self.distributed
+        lines = ["### Agents", "| Agent | Host | Clock offset (ms) | Sync RTT (ms) | Completed | Failed | Stalled | Client saturated |",
+                 "|---|---|---|---|---|---|---|---|"]
+        for a in run.agents:
+            lines.append(f"| {a.agent_id} | {a.host} | {a.clock_offset_ms} | {a.sync_rtt_ms} | {a.completed} | {a.failed} | "
+                         f"{a.stalled} | {'⚠ yes' if a.client_saturated else 'no'} |")
+        lines.append("")
+        lines.extend(["### Merged Agent Histograms (s)", "| Metric | Count | Mean | p50 | p90 | p99 | Max |", "|---|---|---|---|---|---|---|"])
+        for name, hist in (("Total time", run.latency), ("Time to first token", run.time_to_first_token)):
+            lines.append(f"| {name} | {hist.count} | {hist.mean:.3f} | {hist.percentile(50):.3f} | {hist.percentile(90):.3f} | "
+                         f"{hist.percentile(99):.3f} | {hist.max:.3f} |")
+        lines.append("")
+        return lines
+
     def __str__(self) -> str:
         """String representation of the Analysis instance."""
-        return f"{self.__print_table__()}\n{self.summary}\n{self.tokens_per_second}\n{self.response_times}\n{self.time_to_first_token}"
+        text = f"{self.__print_table__()}\n{self.summary}\n{self.tokens_per_second}\n{self.response_times}\n{self.time_to_first_token}"
+        if self.hedging:
+            text += f"\n{self.hedging}"
+        if self.request_cache:
+            text += f"\n{self.request_cache}"
+        if self.client_health:
+            text += f"\n{self.client_health}"
+        if self.distributed:
+            text += f"\n{self.distributed}"
+        return text
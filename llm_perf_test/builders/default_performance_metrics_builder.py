@@ -1,13 +1,48 @@
 
+import asyncio
 import json
 import time
+from typing import Optional
 from aiohttp import ClientResponse
 from llm_perf_test import log
 from llm_perf_test.builders import PerformanceMetricsBuilder
+from llm_perf_test.errors import RequestStalledError
 from llm_perf_test.models import PerformanceMetrics
+from llm_perf_test.token_counters import ApproximateTokenCounter, TokenCounter
 
 class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
-    """Default implementation of PerformanceMetricsBuilder"""
+    """Default implementation of PerformanceMetricsBuilder with stall timeouts and client-side token counting fallback"""
+
+    def __init__(self,
+                 first_token_timeout: float = 0,
+                 chunk_idle_timeout: float = 0,
+                 token_counter: Optional[TokenCounter] = None,
+                 prompt_token_counter: Optional[TokenCounter] = None):
+        self.first_token_timeout = first_token_timeout
+        self.chunk_idle_timeout = chunk_idle_timeout
+        self.token_counter = token_counter or ApproximateTokenCounter()
+        self.prompt_token_counter = prompt_token_counter or self.token_counter
+
+    def _count_tokens(self, prompt: str, content: str) -> tuple[int, int, int]:
+        """Client-side (prompt, completion, total) token counts"""
+        prompt_tokens = self.prompt_token_counter.count(prompt)
+        completion_tokens = self.token_counter.count(content or "")
+        return prompt_tokens, completion_tokens, prompt_tokens + completion_tokens
+
+    async def _read(self, coro, start_time: float, first_token_time: float | None):
+        """Await a body read under the budget of the current phase"""
+        if first_token_time is None:
+            phase, timeout = "first_token", self.first_token_timeout
+            remaining = start_time + timeout - time.time()
+        else:
+            phase, timeout = "chunk_idle", self.chunk_idle_timeout
+            remaining = timeout
+        if not timeout:
+            return await coro
+        try:
+            return await asyncio.wait_for(coro, max(remaining, 0))
+        except asyncio.TimeoutError as e:
+            raise RequestStalledError(phase, timeout, first_token_time) from e
 
     async def build(self, start_time: float, response: ClientResponse, prompt: str, streaming: bool) ->  tuple[PerformanceMetrics, str] | None:
         return  await (self._build_streaming(start_time, response, prompt) if streaming else self._build_non_streaming(start_time, response, prompt))
@@ -15,7 +50,7 @@ class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
     async def _build_non_streaming(self, start_time: float, response: ClientResponse, prompt: str) -> tuple[PerformanceMetrics, str] | None:
         try:
             end_time = time.time()
-            result = await response.json()
+            result = await self._read(response.json(), start_time, None)
             content = result.get("choices")[0].get("message").get("content")
             usage = result.get('usage', {})
             log(f"🔢 Usage received: {usage}")
@@ -23,6 +58,10 @@ class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
             prompt_tokens = usage.get('prompt_tokens', 0)
             completion_tokens = usage.get('completion_tokens', 0)
             reasoning_tokens = (usage.get('completion_tokens_details') or {}).get('reasoning_tokens', 0)
+            token_source = "server"
+            if not total_tokens:
+                prompt_tokens, completion_tokens, total_tokens = self._count_tokens(prompt, content)
+                token_source = "client"
             total_time = end_time - start_time
             tokens_per_second = total_tokens / total_time if total_time > 0 else 0
             request_id = result.get('id', 'unknown')
@@ -35,9 +74,12 @@ class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
                 time_to_first_token=total_time,
                 request_id=request_id,
                 prompt=prompt,
-                reasoning_tokens=reasoning_tokens
+                reasoning_tokens=reasoning_tokens,
+                token_source=token_source
             )
             return metrics, content
+        except RequestStalledError:
+            raise
         except Exception as e:
             log(f"Failed to parse response body: {str(e)}", "error")
             return None
@@ -48,33 +90,39 @@ class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
         total_tokens = prompt_tokens = completion_tokens = reasoning_tokens = 0
         request_id = "unknown"
         try:
-            async for line in response.content:
-                if line:
-                    line_str = line.decode('utf-8').strip()
-                    if line_str.startswith('data: '):
-                        data_str = line_str[6:]
-                        if data_str == '[DONE]':
-                            break
-                        try:
-                            data = json.loads(data_str)
-                            if first_token_time is None:
-                                first_token_time = time.time()
-                            choices = data.get('choices', [])
-                            if choices and choices[0].get('delta', {}).get('content'):
-                                content += choices[0]['delta']['content']
-                            usage = data.get('usage', {})
-                            if usage:
-                                log("🔢 Usage received: {usage}")
-                                completion_tokens = usage.get('completion_tokens', 0)
-                                reasoning_tokens = (usage.get('completion_tokens_details') or {}).get('reasoning_tokens', 0)
-                                prompt_tokens = usage.get('prompt_tokens', 0)
-                                total_tokens = usage.get('total_tokens', 0)
-                            request_id = data.get('id', request_id)
-                        except json.JSONDecodeError:
-                            continue
+            while True:
+                line = await self._read(response.content.readline(), start_time, first_token_time)
+                if not line:
+                    break  # EOF
+                line_str = line.decode('utf-8').strip()
+                if line_str.startswith('data: '):
+                    data_str = line_str[6:]
+                    if data_str == '[DONE]':
+                        break
+                    try:
+                        data = json.loads(data_str)
+                        if first_token_time is None:
+                            first_token_time = time.time()
+                        choices = data.get('choices', [])
+                        if choices and choices[0].get('delta', {}).get('content'):
+                            content += choices[0]['delta']['content']
+                        usage = data.get('usage', {})
+                        if usage:
+                            log("🔢 Usage received: {usage}")
+                            completion_tokens = usage.get('completion_tokens', 0)
+                            reasoning_tokens = (usage.get('completion_tokens_details') or {}).get('reasoning_tokens', 0)
+                            prompt_tokens = usage.get('prompt_tokens', 0)
+                            total_tokens = usage.get('total_tokens', 0)
+                        request_id = data.get('id', request_id)
+                    except json.JSONDecodeError:
+                        continue
             end_time = time.time()
             total_time = end_time - start_time
             time_to_first_token = (first_token_time - start_time) if first_token_time else total_time
+            token_source = "server"
+            if not total_tokens:
+                prompt_tokens, completion_tokens, total_tokens = self._count_tokens(prompt, content)
+                token_source = "client"
             tokens_per_second = total_tokens / total_time if total_time > 0 else 0
             metrics = PerformanceMetrics(
                 total_tokens=total_tokens,
@@ -85,9 +133,13 @@ class DefaultPerformanceMetricsBuilder(PerformanceMetricsBuilder):
                 time_to_first_token=time_to_first_token,
                 request_id=request_id,
                 prompt=prompt,
-                reasoning_tokens=reasoning_tokens
+                reasoning_tokens=reasoning_tokens,
+                token_source=token_source
             )
             return metrics, content
+        except RequestStalledError as e:
+            e.content = content
+            raise
         except Exception as e:
             log(f"Failed to parse streaming response: {str(e)}", "error")
             return None
@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import time
+from typing import Iterator, List, Optional, Set, Tuple
+
+from llm_perf_test import log
+from llm_perf_test.models import PerformanceMetrics
+
+
+class Checkpoint:
+    """Crash-safe, append-only checkpoint of completed requests for one test phase"""
+
+    def __init__(self, result_dir: str, phase: str, total: int, interval_seconds: float = 30.0):
+        self.phase = phase
+        self.total = total
+        self.interval_seconds = interval_seconds
+        self.path = os.path.join(result_dir, f"checkpoint_{phase}.jsonl")
+        self.state_path = os.path.join(result_dir, f"checkpoint_{phase}.json")
+        self.completed: Set[int] = set()  # dataset indices; results stay on disk until restored()
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.mismatched = 0
+
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        """Content hash used to check that a checkpointed index still holds the same prompt"""
+        return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+    def _records(self, prompts: List[str]) -> Iterator[Tuple[int, dict]]:
+        """Checkpointed (index, metrics) records whose index and prompt still match ``prompts``"""
+        if not os.path.exists(self.path):
+            return
+        seen = set()
+        self.mismatched = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from an interrupted run
+                index = record["index"]
+                if index >= len(prompts) or record["prompt_hash"] != self.prompt_hash(prompts[index]):
+                    self.mismatched += 1
+                    continue
+                if index in seen:
+                    continue
+                seen.add(index)
+                yield index, record["metrics"]
+
+    def _truncate_torn_line(self) -> None:
+        """Cut a partial last line left by a hard crash, so the next append starts on a fresh line"""
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                log(f"Discarding {end - position} bytes of a partially written checkpoint record", "warning")
+                f.truncate(position)
+
+    def load(self, prompts: List[str]) -> Set[int]:
+        """Find the completed requests whose dataset index and prompt still match ``prompts``"""
+        if os.path.exists(self.path):
+            self._truncate_torn_line()
+        self.completed = {index for index, _ in self._records(prompts)}
+        if os.path.exists(self.path):
+            log(f"Resuming {self.phase}: {len(self.completed)}/{len(prompts)} requests restored from {self.path}")
+        if self.mismatched:
+            log(f"  {self.mismatched} checkpointed results did not match the current dataset and will be re-run", "warning")
+        return self.completed
+
+    def restored(self, prompts: List[str]) -> Iterator[Tuple[int, PerformanceMetrics]]:
+        """Stream the results found by load() back from disk, one at a time"""
+        for index, metrics in self._records(prompts):
+            if index in self.completed:
+                yield index, PerformanceMetrics(**metrics, prompt=prompts[index])
+
+    def reset(self) -> None:
+        """Discard any checkpoint left in the result directory by a previous run"""
+        self.completed = set()
+        for path in (self.path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def record(self, index: int, prompt: str, metrics: PerformanceMetrics) -> None:
+        """Register a completed request; written to disk on the next periodic flush (see ``async with``)"""
+        self.completed.add(index)
+        self._buffer.append(json.dumps({
+            "index": index,
+            "prompt_hash": self.prompt_hash(prompt),
+            "metrics": metrics.model_dump(exclude={"prompt"})
+        }))
+        if time.monotonic() - self._last_flush >= self.interval_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append buffered results, fsync them and atomically update the position state file"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
+
+        next_index = next((i for i in range(self.total) if i not in self.completed), self.total)
+        state = {
+            "phase": self.phase,
+            "total": self.total,
+            "completed": len(self.completed),
+            "next_index": next_index,
+            "updated": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def __aenter__(self) -> "Checkpoint":
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+
+    async def _flush_periodically(self) -> None:
+        # Flush on a timer too, so a result is never held only in memory because no later request completed
+        while True:
+            await asyncio.sleep(max(self._last_flush + self.interval_seconds - time.monotonic(), 0.01))
+            if time.monotonic() - self._last_flush >= self.interval_seconds:
+                self.flush()
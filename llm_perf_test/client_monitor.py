@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import time
+from statistics import mean, quantiles
+from typing import Callable, List, Optional
+
+from llm_perf_test import log
+from llm_perf_test.models import ClientHealth, ClientSample
+
+
+class ClientMonitor:
+    """Sample the load generator's own health (loop lag, CPU, memory, in-flight requests) while a test runs"""
+
+    def __init__(self,
+                 in_flight: Callable[[], int] = lambda: 0,
+                 interval: float = 1.0,
+                 loop_lag_warn_ms: float = 50.0,
+                 cpu_warn_percent: float = 90.0):
+        self.in_flight = in_flight
+        self.interval = interval
+        self.loop_lag_warn_ms = loop_lag_warn_ms
+        self.cpu_warn_percent = cpu_warn_percent
+        self.samples: List[ClientSample] = []
+        self.health: Optional[ClientHealth] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ClientMonitor":
+        self.samples = []
+        self.health = None
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.health = self.summarize()
+        for warning in self.health.warnings:
+            log(f"⚠ Client bottleneck: {warning}", "warning")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = last_wall = loop.time()
+        last_cpu = time.process_time()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            cpu = time.process_time()
+            wall = now - last_wall
+            self.samples.append(ClientSample(
+                elapsed=round(now - started, 3),
+                loop_lag_ms=round(max(0.0, wall - self.interval) * 1000, 2),
+                cpu_percent=round((cpu - last_cpu) / wall * 100 if wall > 0 else 0, 1),
+                rss_mb=round(_rss_bytes() / (1024 * 1024), 1),
+                in_flight=self.in_flight(),
+                tasks=len(asyncio.all_tasks())
+            ))
+            last_wall, last_cpu = now, cpu
+
+    def summarize(self) -> ClientHealth:
+        """Aggregate the collected samples and decide whether the client was saturated."""
+        lags = [s.loop_lag_ms for s in self.samples] or [0.0]
+        cpus = [s.cpu_percent for s in self.samples] or [0.0]
+        p95_lag = quantiles(lags, n=20, method="inclusive")[-1] if len(lags) > 1 else lags[0]
+
+        warnings = []
+        if p95_lag >= self.loop_lag_warn_ms:
+            warnings.append(f"p95 event-loop lag {p95_lag:.1f} ms >= {self.loop_lag_warn_ms} ms; "
+                            "TTFT and latency include client-side scheduling delay")
+        busy = [c for c in cpus if c >= self.cpu_warn_percent]
+        if len(busy) * 2 > len(cpus):
+            warnings.append(f"process CPU >= {self.cpu_warn_percent}% in {len(busy)}/{len(cpus)} samples; "
+                            "the load generator is CPU-bound")
+
+        return ClientHealth(
+            samples_taken=len(self.samples),
+            mean_loop_lag_ms=round(mean(lags), 2),
+            p95_loop_lag_ms=round(p95_lag, 2),
+            max_loop_lag_ms=round(max(lags), 2),
+            mean_cpu_percent=round(mean(cpus), 1),
+            max_cpu_percent=round(max(cpus), 1),
+            peak_rss_mb=max((s.rss_mb for s in self.samples), default=round(_rss_bytes() / (1024 * 1024), 1)),
+            max_in_flight=max((s.in_flight for s in self.samples), default=0),
+            client_saturated=bool(warnings),
+            warnings=warnings,
+            samples=self.samples
+        )
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to peak RSS where /proc is unavailable, 0 where neither is."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource  # not available on Windows
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
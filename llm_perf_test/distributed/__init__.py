@@ -0,0 +1,6 @@
+from .agent import Agent, ProgressRecorder
+from .coordinator import Coordinator
+
+__all__ = ["Agent",
+           "ProgressRecorder",
+           "Coordinator"]
@@ -0,0 +1,140 @@
+import asyncio
+import socket
+import time
+import uuid
+from typing import Optional
+
+from llm_perf_test import AnalysisAccumulator, LLMPerformanceTester, log
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.distributed.protocol import STREAM_LIMIT, read_message, send_message
+from llm_perf_test.models import LatencyHistogram, PerformanceMetrics
+from llm_perf_test.writers import ResultWriter
+
+
+class ProgressRecorder(ResultWriter):
+    """ResultWriter that folds completed requests into histograms and, if asked to, buffers rows (prompt hash, not text) until the next report"""
+
+    def __init__(self, keep_rows: bool = False):
+        super().__init__(path="")
+        self.latency = LatencyHistogram()
+        self.time_to_first_token = LatencyHistogram()
+        self.stalled = 0
+        self.keep_rows = keep_rows
+        self.rows: list[dict] = []
+
+    def write(self, metrics: PerformanceMetrics) -> None:
+        self.rows_written += 1
+        if metrics.status == "ok":
+            self.latency.record(metrics.total_time)
+            self.time_to_first_token.record(metrics.time_to_first_token)
+        else:
+            self.stalled += 1
+        if self.keep_rows:
+            self.rows.append({"prompt_hash": Checkpoint.prompt_hash(metrics.prompt),
+                              "metrics": metrics.model_dump(exclude={"prompt"})})
+
+    def close(self) -> None:
+        pass
+
+
+class Agent:
+    """Load-generating agent driven by a Coordinator over TCP; uses its own endpoint and credentials"""
+
+    def __init__(self,
+                 tester: LLMPerformanceTester,
+                 host: str,
+                 port: int,
+                 agent_id: Optional[str] = None,
+                 progress_interval: float = 5.0,
+                 sync_rounds: int = 8,
+                 batch_size: int = 500):
+        self.tester = tester
+        self.host = host
+        self.port = port
+        self.agent_id = agent_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+        self.progress_interval = progress_interval
+        self.sync_rounds = sync_rounds
+        self.batch_size = batch_size
+
+    async def run(self) -> None:
+        """Connect, run the assigned workload and report back"""
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        try:
+            await send_message(writer, "hello", agent_id=self.agent_id, host=socket.gethostname())
+            offset, rtt = await self._sync_clock(reader, writer)
+            log(f"Agent {self.agent_id}: clock offset {offset * 1000:.2f} ms (rtt {rtt * 1000:.2f} ms)")
+            await send_message(writer, "ready", offset=offset, rtt=rtt)
+
+            spec = await read_message(reader)
+            if spec["type"] == "abort":
+                log(f"Agent {self.agent_id}: coordinator aborted the run: {spec['reason']}", "error")
+                return
+            if spec["type"] != "workload":
+                raise ValueError(f"Expected 'workload' message, got '{spec['type']}'")
+            delay = spec["start_at"] - offset - time.time()
+            log(f"Agent {self.agent_id}: {len(spec['prompts'])} requests at concurrency {spec['concurrent']}, "
+                f"starting in {delay:.2f}s")
+            await asyncio.sleep(max(0.0, delay))
+
+            recorder = ProgressRecorder(keep_rows=spec["upload_rows"])
+            accumulator = AnalysisAccumulator(top_n=spec["top_n"])
+            finished = asyncio.Event()
+            progress = asyncio.create_task(self._report_progress(writer, recorder, finished))
+            try:
+                completed = await self.tester.concurrent_test(spec["prompts"],
+                                                            concurrent_requests=spec["concurrent"],
+                                                            request_timeout=spec["request_timeout"],
+                                                            use_streaming=spec["use_streaming"],
+                                                            result_writer=recorder,
+                                                            accumulator=accumulator)
+            finally:
+                # Let the reporter send the remaining rows and a final snapshot rather than cancel it mid-send
+                finished.set()
+                await progress
+
+            health = self.tester.client_health
+            # The run's aggregates and top-N travel once, at the end, instead of every row
+            await send_message(writer, "done",
+                               failed=len(spec["prompts"]) - completed,
+                               client_health=health.model_dump(exclude={"samples"}) if health else None,
+                               analysis=accumulator.state())
+            log(f"Agent {self.agent_id}: finished, {completed}/{len(spec['prompts'])} requests completed")
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def _sync_clock(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> tuple[float, float]:
+        """NTP-style offset estimate (coordinator minus local clock) from the lowest-RTT exchange"""
+        best = (0.0, float("inf"))
+        for _ in range(self.sync_rounds):
+            t0 = time.time()
+            await send_message(writer, "sync", t0=t0)
+            reply = await read_message(reader, "sync")
+            t2 = time.time()
+            rtt = t2 - t0
+            if rtt < best[1]:
+                best = (reply["t1"] - (t0 + t2) / 2, rtt)
+        return best
+
+    async def _report_progress(self,
+                               writer: asyncio.StreamWriter,
+                               recorder: ProgressRecorder,
+                               finished: asyncio.Event) -> None:
+        while not finished.is_set():
+            try:
+                await asyncio.wait_for(finished.wait(), self.progress_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._send_progress(writer, recorder)
+
+    async def _send_progress(self, writer: asyncio.StreamWriter, recorder: ProgressRecorder) -> None:
+        # Rows (only kept when the coordinator writes a results file) go first, so the agent never holds the whole run
+        rows, recorder.rows = recorder.rows, []
+        for start in range(0, len(rows), self.batch_size):
+            await send_message(writer, "results", rows=rows[start:start + self.batch_size])
+        await send_message(writer, "progress",
+                           completed=recorder.rows_written,
+                           stalled=recorder.stalled,
+                           in_flight=self.tester.in_flight,
+                           latency=recorder.latency.model_dump(),
+                           time_to_first_token=recorder.time_to_first_token.model_dump())
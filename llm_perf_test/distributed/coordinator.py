@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from llm_perf_test import Analysis, AnalysisAccumulator, log
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.distributed.protocol import STREAM_LIMIT, read_message, send_message
+from llm_perf_test.models import AgentSummary, DistributedRun, LatencyHistogram, PerformanceMetrics
+from llm_perf_test.writers import ResultWriter
+
+
+class Coordinator:
+    """Coordinate a load test across several Agent processes over TCP and merge their results into one Analysis"""
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 expected_agents: int,
+                 start_delay: float = 5.0,
+                 progress_interval: float = 5.0,
+                 join_timeout: float = 300.0):
+        self.host = host
+        self.port = port
+        self.expected_agents = expected_agents
+        self.start_delay = start_delay
+        self.progress_interval = progress_interval
+        self.join_timeout = join_timeout
+        self.agents: Dict[str, AgentSummary] = {}
+        self._progress: Dict[str, dict] = {}
+        self._accumulator = AnalysisAccumulator()
+        self._by_hash: Dict[str, str] = {}
+        self._result_writer: Optional[ResultWriter] = None
+        self._workload: dict = {}
+        self._all_ready = asyncio.Event()
+        self._aborted = False
+        self._finished: List[asyncio.Future] = []  # one per ready agent
+
+    async def run(self,
+                  prompts: List[str],
+                  concurrent: int,
+                  request_timeout: int,
+                  use_streaming: bool = False,
+                  result_writer: Optional[ResultWriter] = None,
+                  **analysis_kwargs) -> Optional[Analysis]:
+        """Run prompts on every agent and merge their summaries into one Analysis; rows are uploaded only for ``result_writer``"""
+        self._by_hash = {Checkpoint.prompt_hash(p): p for p in prompts}
+        self._result_writer = result_writer
+        self._accumulator = AnalysisAccumulator(**analysis_kwargs)
+        self._workload = {"prompts": prompts, "concurrent": concurrent,
+                          "request_timeout": request_timeout, "use_streaming": use_streaming,
+                          "top_n": self._accumulator.top_n, "upload_rows": result_writer is not None}
+        server = await asyncio.start_server(self._handle_agent, self.host, self.port, limit=STREAM_LIMIT)
+        log(f"Coordinator listening on {self.host}:{self.port}, waiting for {self.expected_agents} agent(s)...")
+        async with server:
+            try:
+                await asyncio.wait_for(self._all_ready.wait(), self.join_timeout or None)
+            except asyncio.TimeoutError:
+                # Release the agents that did get ready so they exit instead of waiting for a workload
+                self._aborted = True
+                self._all_ready.set()
+                await asyncio.gather(*self._finished, return_exceptions=True)
+                raise TimeoutError(f"Only {len(self.agents)}/{self.expected_agents} agent(s) were ready "
+                                   f"after {self.join_timeout}s") from None
+            reporter = asyncio.create_task(self._log_progress())
+            try:
+                outcomes = await asyncio.gather(*self._finished, return_exceptions=True)
+            finally:
+                reporter.cancel()
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                log(f"Agent failed: {outcome}", "warning")
+
+        analysis = self._accumulator.build()
+        if analysis:
+            analysis.distributed = self._merged()
+        return analysis
+
+    async def _join(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional[str]:
+        """Handshake and clock sync; returns the agent id once it holds a slot, None if the run is full"""
+        hello = await read_message(reader, "hello")
+        agent_id = hello["agent_id"]
+        while True:
+            message = await read_message(reader)
+            if message["type"] == "sync":
+                await send_message(writer, "sync", t0=message["t0"], t1=time.time())
+            elif message["type"] == "ready":
+                break
+        if self._all_ready.is_set() or len(self.agents) >= self.expected_agents:
+            await send_message(writer, "abort", reason=f"coordinator already has {self.expected_agents} agent(s)")
+            return None
+        self.agents[agent_id] = AgentSummary(agent_id=agent_id,
+                                             host=hello["host"],
+                                             clock_offset_ms=round(message["offset"] * 1000, 3),
+                                             sync_rtt_ms=round(message["rtt"] * 1000, 3))
+        log(f"Agent {agent_id} ready ({len(self.agents)}/{self.expected_agents}), "
+            f"clock offset {self.agents[agent_id].clock_offset_ms} ms")
+        if len(self.agents) >= self.expected_agents:
+            self._workload["start_at"] = time.time() + self.start_delay
+            log(f"All agents ready; starting in {self.start_delay}s")
+            self._all_ready.set()
+        return agent_id
+
+    async def _handle_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Only agents that complete the handshake take a slot; probes and dropped connections are discarded
+        try:
+            agent_id = await self._join(reader, writer)
+        except Exception as e:
+            log(f"Connection from {writer.get_extra_info('peername')} dropped before it was ready: {e}", "warning")
+            writer.close()
+            return
+        if agent_id is None:
+            log(f"Rejecting extra agent connection from {writer.get_extra_info('peername')}", "warning")
+            writer.close()
+            return
+
+        finished = asyncio.get_running_loop().create_future()
+        self._finished.append(finished)
+        try:
+            await self._all_ready.wait()
+            if self._aborted:
+                await send_message(writer, "abort", reason="not all agents were ready in time")
+                finished.set_result(agent_id)
+                return
+            await send_message(writer, "workload", **self._workload)
+
+            while True:
+                message = await read_message(reader)
+                if message["type"] == "progress":
+                    self._progress[agent_id] = message
+                elif message["type"] == "results" and self._result_writer:
+                    for row in message["rows"]:
+                        self._result_writer.write(PerformanceMetrics(**row["metrics"],
+                                                                     prompt=self._by_hash.get(row["prompt_hash"], "")))
+                elif message["type"] == "done":
+                    self._accumulator.merge(AnalysisAccumulator.from_state(message["analysis"], self._by_hash))
+                    progress = self._progress.get(agent_id, {})
+                    summary = self.agents[agent_id]
+                    summary.failed = message["failed"]
+                    summary.stalled = progress.get("stalled", 0)
+                    summary.completed = progress.get("completed", 0) - summary.stalled
+                    summary.client_saturated = bool((message.get("client_health") or {}).get("client_saturated"))
+                    if summary.client_saturated:
+                        log(f"⚠ Agent {agent_id} was client-bound; its latencies are suspect", "warning")
+                    break
+            finished.set_result(agent_id)
+        except Exception as e:
+            finished.set_exception(e)
+        finally:
+            writer.close()
+
+    def _merged(self) -> DistributedRun:
+        """Merge the latest histogram snapshot of every agent"""
+        run = DistributedRun(agents=list(self.agents.values()))
+        for progress in self._progress.values():
+            run.latency.merge(LatencyHistogram(**progress["latency"]))
+            run.time_to_first_token.merge(LatencyHistogram(**progress["time_to_first_token"]))
+        return run
+
+    async def _log_progress(self) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            if not self._progress:
+                continue
+            run = self._merged()
+            completed = sum(p["completed"] for p in self._progress.values())
+            in_flight = sum(p["in_flight"] for p in self._progress.values())
+            log(f"Progress: {completed} completed, {in_flight} in flight across {len(self._progress)} agent(s); "
+                f"latency p50 {run.latency.percentile(50):.3f}s p99 {run.latency.percentile(99):.3f}s")
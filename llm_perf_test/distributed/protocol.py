@@ -0,0 +1,23 @@
+"""Newline-delimited JSON messages exchanged between coordinator and agents over TCP."""
+import asyncio
+import json
+
+# Workload messages carry the full prompt list, so allow long lines
+STREAM_LIMIT = 256 * 1024 * 1024
+
+
+async def send_message(writer: asyncio.StreamWriter, msg_type: str, **payload) -> None:
+    """Send one message of the given type"""
+    writer.write((json.dumps({"type": msg_type, **payload}) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+async def read_message(reader: asyncio.StreamReader, expected: str | None = None) -> dict:
+    """Read one message; raise ConnectionError on EOF and ValueError on an unexpected type"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Peer closed the connection")
+    message = json.loads(line)
+    if expected and message.get("type") != expected:
+        raise ValueError(f"Expected '{expected}' message, got '{message.get('type')}'")
+    return message
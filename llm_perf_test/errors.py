@@ -0,0 +1,12 @@
+"""Exceptions raised by llm_perf_test."""
+
+
+class RequestStalledError(Exception):
+    """A request exceeded its time-to-first-token or inter-chunk idle budget and was cancelled."""
+
+    def __init__(self, phase: str, timeout: float, first_token_time: float | None = None, content: str = ""):
+        super().__init__(f"Request stalled waiting for {phase.replace('_', ' ')} (timeout {timeout}s)")
+        self.phase = phase  # "first_token" or "chunk_idle"
+        self.timeout = timeout
+        self.first_token_time = first_token_time
+        self.content = content  # streamed text received before the stall
@@ -1,15 +1,24 @@
 import asyncio
+import contextlib
 import os
 import ssl
 import time
+from collections import deque
+from statistics import quantiles
 from typing import List,Optional
-import uuid
 
 import aiohttp
 
 from llm_perf_test import log
+from llm_perf_test.analysis import AnalysisAccumulator
 from llm_perf_test.builders import PerformanceMetricsBuilder, DefaultPerformanceMetricsBuilder
-from llm_perf_test.models import PerformanceMetrics
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.client_monitor import ClientMonitor
+from llm_perf_test.errors import RequestStalledError
+from llm_perf_test.models import ClientHealth, PerformanceMetrics
+from llm_perf_test.request_preparer import RequestPreparer
+from llm_perf_test.token_counters import ApproximateTokenCounter, CachedTokenCounter, TokenCounter
+from llm_perf_test.writers import ResultWriter
 
 
 class LLMPerformanceTester:
@@ -21,19 +30,62 @@ class LLMPerformanceTester:
                  result_dir: str = "",
                  api_version: str = "",
                  verify_ssl: bool = True,
-                 metrics_builder: Optional[PerformanceMetricsBuilder] = None):
+                 metrics_builder: Optional[PerformanceMetricsBuilder] = None,
+                 request_cache_max_bytes: int = 256 * 1024 * 1024,
+                 monitor_interval: float = 1.0,
+                 loop_lag_warn_ms: float = 50.0,
+                 cpu_warn_percent: float = 90.0,
+                 connect_timeout: float = 0,
+                 first_token_timeout: float = 0,
+                 chunk_idle_timeout: float = 0,
+                 hedge_delay_seconds: float = 0,
+                 hedge_percentile: float = 0,
+                 hedge_drain_loser: bool = False,
+                 token_counter: Optional[TokenCounter] = None,
+                 token_cache_path: str = ""):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.model = model
         self.api_version = api_version
         self.verify_ssl = verify_ssl
         self.result_dir = result_dir
-        self.metrics_builder = metrics_builder or DefaultPerformanceMetricsBuilder()
-        self.headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-            "api-key": self.api_key  # For Azure OpenAI compatibility
-        }
+        self.connect_timeout = connect_timeout
+        self.first_token_timeout = first_token_timeout
+        self.chunk_idle_timeout = chunk_idle_timeout
+        self.token_counter = token_counter or ApproximateTokenCounter()
+        # Prompt counts are memoized on disk; completions are unique per response and counted directly
+        self.prompt_token_counter = CachedTokenCounter(self.token_counter, token_cache_path)
+        self.metrics_builder = metrics_builder or DefaultPerformanceMetricsBuilder(first_token_timeout=first_token_timeout,
+                                                                                  chunk_idle_timeout=chunk_idle_timeout,
+                                                                                  token_counter=self.token_counter,
+                                                                                  prompt_token_counter=self.prompt_token_counter)
+        self.request_preparer = RequestPreparer(base_url=self.base_url,
+                                                model=self.model,
+                                                api_key=self.api_key,
+                                                api_version=self.api_version,
+                                                max_bytes=request_cache_max_bytes)
+        self.headers = self.request_preparer.header_template
+        self.monitor_interval = monitor_interval
+        self.loop_lag_warn_ms = loop_lag_warn_ms
+        self.cpu_warn_percent = cpu_warn_percent
+        self.in_flight = 0
+        self.client_health: Optional[ClientHealth] = None
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.hedge_percentile = min(max(hedge_percentile, 0), 99)
+        self.hedge_drain_loser = hedge_drain_loser
+        self._latencies: deque[float] = deque(maxlen=1000)  # recent un-hedged latencies for percentile hedging
+        self._percentile_delay: Optional[float] = None
+        self._trace_config = aiohttp.TraceConfig()
+        self._trace_config.on_request_headers_sent.append(self._on_request_sent)
+
+    @staticmethod
+    async def _on_request_sent(session, context, params) -> None:
+        if callable(context.trace_request_ctx):
+            context.trace_request_ctx()
+
+    def create_session(self, connector: aiohttp.BaseConnector, timeout: aiohttp.ClientTimeout) -> aiohttp.ClientSession:
+        """ClientSession that tells single_request when each request leaves the connection pool"""
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[self._trace_config])
 
     def save_raw_response(self, content: str, request_id: str) -> None:
         """Save raw JSON response to a file"""
@@ -47,6 +99,17 @@ class LLMPerformanceTester:
         except Exception as e:
             log(f"Failed to save raw response: {str(e)}", "error")
 
+    def client_monitor(self) -> ClientMonitor:
+        """Create a ClientMonitor that tracks this tester's in-flight requests"""
+        return ClientMonitor(in_flight=lambda: self.in_flight,
+                             interval=self.monitor_interval,
+                             loop_lag_warn_ms=self.loop_lag_warn_ms,
+                             cpu_warn_percent=self.cpu_warn_percent)
+
+    def client_timeout(self, request_timeout: float) -> aiohttp.ClientTimeout:
+        """Overall request timeout and connect timeout, both in seconds (0 disables)"""
+        return aiohttp.ClientTimeout(total=request_timeout or None, sock_connect=self.connect_timeout or None)
+
     def get_ssl_context(self) -> ssl.SSLContext|bool:
         """Create SSL context based on verification setting"""
         if not self.verify_ssl:
@@ -61,38 +124,10 @@ class LLMPerformanceTester:
                            session: aiohttp.ClientSession,
                            prompt: str,
                            temperature: float = 0.0,
-                           use_streaming: bool = False) -> PerformanceMetrics:
-
-        """Perform a single request and measure performance"""
-        def _build_endpoint():
-            # For Azure OpenAI, use chat/completions endpoint
-            url = f"{self.base_url}/chat/completions"
-            if self.api_version!='' and "api-version" not in url:
-                url += f"?api-version={self.api_version}"
-            return url
-        
-        def _build_payload():
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": temperature,
-                "stream": use_streaming
-            }
-            if use_streaming:
-                payload["stream_options"] = {"include_usage": True}  # Request usage in streaming
-            return payload
-
-        def _build_headers():
-            headers = self.headers.copy()
-            headers.update({
-                "x-conversation-id": str(uuid.uuid4()),          # custom
-                "x-ms-client-request-id": str(uuid.uuid4())      # Azure trace (GUID)
-            })
-            return headers
-        
+                           use_streaming: bool = False,
+                           sent: Optional[asyncio.Event] = None) -> PerformanceMetrics:
 
+        """Perform a single request and measure performance from when it is sent; ``sent`` is set at that point"""
         async def _check_response_status(response):
             if response.status != 200:
                 error_text = await response.text()
@@ -104,32 +139,205 @@ class LLMPerformanceTester:
                             headers=response.headers
                         )
         
-        start_time = time.time()
-        
+        prepare_start = time.perf_counter()
+        headers = self.request_preparer.headers()
+        body = self.request_preparer.body(prompt, temperature, use_streaming)
+        prepare_time = time.perf_counter() - prepare_start
+
+        queued_at = start_time = time.time()
+        self.in_flight += 1
+        # Response headers count against the time-to-first-token budget; the builder enforces the rest.
+        # Time spent waiting for a pooled connection is not the server's, so the clock starts on send.
+        header_deadline = asyncio.timeout(None)
+        loop = asyncio.get_running_loop()
+
+        def _on_sent() -> None:
+            nonlocal start_time
+            start_time = time.time()
+            if self.first_token_timeout:
+                header_deadline.reschedule(loop.time() + self.first_token_timeout)
+            if sent:
+                sent.set()
+
         try:
-            async with session.post(_build_endpoint(),
-                                  headers=_build_headers(),
-                                  json=_build_payload()) as response:
-
-                await _check_response_status(response)
-                result = await self.metrics_builder.build(start_time, response, prompt, use_streaming)
-                if result is None:
-                    raise ValueError("Failed to extract performance metrics from response.")
-                metrics, content = result
-                if content:
-                    self.save_raw_response(content, metrics.request_id)
-                return metrics
-                
+            async with header_deadline:
+                if self._trace_config not in session.trace_configs:
+                    _on_sent()  # not created by create_session(): time from now
+                async with session.post(self.request_preparer.endpoint,
+                                      headers=headers,
+                                      data=body,
+                                      trace_request_ctx=_on_sent) as response:
+                    header_deadline.reschedule(None)
+
+                    await _check_response_status(response)
+                    result = await self.metrics_builder.build(start_time, response, prompt, use_streaming)
+                    if result is None:
+                        raise ValueError("Failed to extract performance metrics from response.")
+                    metrics, content = result
+                    metrics.prepare_time = prepare_time
+                    metrics.queue_time = start_time - queued_at
+                    if content:
+                        self.save_raw_response(content, metrics.request_id)
+                    return metrics
+
+        except RequestStalledError as e:
+            stall = e
+        except TimeoutError as e:
+            if not header_deadline.expired():
+                log(f"Request failed: {str(e)}", "error")
+                raise
+            stall = RequestStalledError("first_token", self.first_token_timeout)
         except Exception as e:
             log(f"Request failed: {str(e)}", "error")
             raise
+        finally:
+            self.in_flight -= 1
+
+        # Stalled: the response was abandoned (connection closed) and is recorded as such.
+        # The server never reported usage, so count the prompt and any streamed text locally.
+        log(f"{stall} - cancelled", "warning")
+        elapsed = time.time() - start_time
+        prompt_tokens = self.prompt_token_counter.count(prompt)
+        completion_tokens = self.token_counter.count(stall.content)
+        return PerformanceMetrics(
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_time=elapsed,
+            tokens_per_second=0,
+            time_to_first_token=(stall.first_token_time - start_time) if stall.first_token_time else elapsed,
+            request_id=f"stalled-{headers['x-ms-client-request-id']}",
+            prompt=prompt,
+            prepare_time=prepare_time,
+            queue_time=start_time - queued_at,
+            status="stalled",
+            stall_phase=stall.phase,
+            token_source="client"
+        )
+
+    @property
+    def hedging_enabled(self) -> bool:
+        """Whether hedged_request should be used instead of single_request"""
+        return self.hedge_delay_seconds > 0 or self.hedge_percentile > 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (percentile of recent latencies, else the fixed delay); None = don't hedge"""
+        if self.hedge_percentile > 0 and self._percentile_delay is not None:
+            return self._percentile_delay
+        return self.hedge_delay_seconds or None
+
+    def _observe_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        if self.hedge_percentile > 0 and len(self._latencies) >= 20 and len(self._latencies) % 10 == 0:
+            cut_points = quantiles(self._latencies, n=100, method="inclusive")
+            self._percentile_delay = cut_points[int(self.hedge_percentile) - 1]
+
+    async def hedged_request(self,
+                             session: aiohttp.ClientSession,
+                             prompt: str,
+                             temperature: float = 0.0,
+                             use_streaming: bool = False) -> PerformanceMetrics:
+        """Send a request and, if it has not finished within the hedge delay of being sent, a duplicate; the slower copy is cancelled"""
+        sent = asyncio.Event()
+        queued_at = time.time()
+        primary = asyncio.create_task(self.single_request(session, prompt, temperature, use_streaming, sent))
+        # The hedge clock starts once the primary is on the wire, not while it queues for a connection
+        sent_wait = asyncio.create_task(sent.wait())
+        await asyncio.wait({primary, sent_wait}, return_when=asyncio.FIRST_COMPLETED)
+        sent_wait.cancel()
+        started = time.time()
+        queue_time = started - queued_at
+        delay = self.hedge_delay()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            metrics = primary.result()
+            metrics.primary_time = metrics.total_time
+            if metrics.status == "ok":
+                self._observe_latency(metrics.total_time)
+            return metrics
+
+        hedge_offset = time.time() - started
+        hedge = asyncio.create_task(self.single_request(session, prompt, temperature, use_streaming))
+        if self.hedge_drain_loser:
+            primary_result, hedge_result = await asyncio.gather(primary, hedge, return_exceptions=True)
+            return self._drained_hedge_result(primary_result, hedge_result, hedge_offset)
+
+        # The first successful copy wins; the other is cancelled, closing its connection
+        winner, pending = None, {primary, hedge}
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in (primary, hedge) if task in done and not task.exception()
+                           and task.result().status == "ok"), None)
+        primary_time = time.time() - started
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            if primary.exception():
+                raise primary.exception()
+            metrics = primary.result()
+            metrics.hedged = True
+            return metrics
+
+        metrics = winner.result().model_copy()
+        loser = hedge if winner is primary else primary
+        if winner is hedge:
+            metrics.time_to_first_token += hedge_offset + metrics.queue_time
+            metrics.total_time += hedge_offset + metrics.queue_time
+            metrics.tokens_per_second = metrics.total_tokens / metrics.total_time if metrics.total_time > 0 else 0
+            metrics.queue_time = queue_time
+        else:
+            primary_time = metrics.total_time
+        metrics.hedged = True
+        metrics.hedge_won = winner is hedge
+        metrics.primary_time = primary_time  # a lower bound when the primary was cancelled
+        # A cancelled, failed or stalled loser still had its prompt processed
+        loser_tokens = 0 if loser.cancelled() or loser.exception() else loser.result().total_tokens
+        metrics.hedge_extra_tokens = loser_tokens or metrics.prompt_tokens
+        self._observe_latency(primary_time)
+        return metrics
+
+    def _drained_hedge_result(self, primary_result, hedge_result, hedge_offset: float) -> PerformanceMetrics:
+        """Pick the copy that answered first once both have run to completion (LLM_HEDGE_DRAIN_LOSER)"""
+        candidates = []
+        if isinstance(primary_result, PerformanceMetrics) and primary_result.status == "ok":
+            candidates.append((primary_result.total_time, primary_result, hedge_result, False))
+        if isinstance(hedge_result, PerformanceMetrics) and hedge_result.status == "ok":
+            candidates.append((hedge_offset + hedge_result.queue_time + hedge_result.total_time,
+                               hedge_result, primary_result, True))
+        if not candidates:
+            if isinstance(primary_result, Exception):
+                raise primary_result
+            primary_result.hedged = True
+            return primary_result
+
+        effective_time, winner, loser, hedge_won = min(candidates, key=lambda c: c[0])
+        metrics = winner.model_copy()
+        if hedge_won:
+            metrics.time_to_first_token += hedge_offset + hedge_result.queue_time
+            metrics.queue_time = primary_result.queue_time if isinstance(primary_result, PerformanceMetrics) else 0.0
+        metrics.total_time = effective_time
+        metrics.tokens_per_second = metrics.total_tokens / effective_time if effective_time > 0 else 0
+        metrics.hedged = True
+        metrics.hedge_won = hedge_won
+        metrics.primary_time = primary_result.total_time if isinstance(primary_result, PerformanceMetrics) else effective_time
+        # A loser that failed or stalled still had its prompt processed
+        loser_tokens = loser.total_tokens if isinstance(loser, PerformanceMetrics) else 0
+        metrics.hedge_extra_tokens = loser_tokens or winner.prompt_tokens
+        if isinstance(primary_result, PerformanceMetrics) and primary_result.status == "ok":
+            self._observe_latency(primary_result.total_time)
+        return metrics
 
     async def concurrent_test(self,
                             prompts: List[str],
                             concurrent_requests: int,
                             request_timeout: int,
-                            use_streaming: bool = False) -> List[PerformanceMetrics]:
-        """Run concurrent requests to test throughput"""
+                            use_streaming: bool = False,
+                            result_writer: Optional[ResultWriter] = None,
+                            checkpoint: Optional[Checkpoint] = None,
+                            accumulator: Optional[AnalysisAccumulator] = None) -> int:
+        """Run concurrent requests to test throughput, streaming results instead of keeping them; returns how many completed"""
         
         # Create SSL context and connector with SSL verification settings
         ssl_context = self.get_ssl_context()
@@ -137,25 +345,43 @@ class LLMPerformanceTester:
             limit=concurrent_requests * 2,
             ssl=ssl_context
         )
-        timeout = aiohttp.ClientTimeout(total=request_timeout)  # 5 minute timeout
+        timeout = self.client_timeout(request_timeout)
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            tasks = []
-            
-            for prompt in prompts:
-                task = self.single_request(session,prompt,use_streaming=use_streaming)
-                tasks.append(task)
-            
-            # Run requests concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        monitor = self.client_monitor()
+        async with self.create_session(connector, timeout) as session:
+            request = self.hedged_request if self.hedging_enabled else self.single_request
+
+            def _record(index: int, prompt: str, metrics: PerformanceMetrics) -> None:
+                if result_writer:
+                    result_writer.write(metrics)
+                if checkpoint:
+                    checkpoint.record(index, prompt, metrics)
+                if accumulator:
+                    accumulator.add(metrics)
+
+            async def _request(index: int, prompt: str) -> None:
+                _record(index, prompt, await request(session, prompt, use_streaming=use_streaming))
+
+            restored = set(checkpoint.completed) if checkpoint else set()
+            if checkpoint:
+                for index, metrics in checkpoint.restored(prompts):
+                    if result_writer:
+                        result_writer.write(metrics)
+                    if accumulator:
+                        accumulator.add(metrics)
+
+            tasks = [_request(index, prompt) for index, prompt in enumerate(prompts) if index not in restored]
             
-            # Filter out exceptions
-            valid_results = [r for r in results if isinstance(r, PerformanceMetrics)]
+            # Run requests concurrently while sampling the client's own health and flushing the checkpoint
+            async with monitor, (checkpoint or contextlib.nullcontext()):
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            self.client_health = monitor.health
+            self.prompt_token_counter.save()
+
             exceptions = [r for r in results if isinstance(r, Exception)]
-            
             if exceptions:
                 log(f"Warning: {len(exceptions)} requests failed", "warning")
                 for i, exc in enumerate(exceptions[:3]):  # Show first 3 exceptions
                     log(f"  Exception {i+1}: {str(exc)}", "warning")
 
-            return valid_results
+            return len(restored) + len(results) - len(exceptions)
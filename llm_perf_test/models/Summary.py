@@ -5,12 +5,16 @@ class Summary(BaseModel):
     """Summary of performance test results."""
     total_requests: int
     successful_requests: int
+    stalled_requests: int = 0
     total_tokens: int  # input + output
     total_prompt_tokens: int
     total_tokens_generated: int
     total_reasoning_tokens: int
     total_time_elapsed: float
     average_tokens_per_request: float
+    total_prepare_time: float = 0.0  # client-side request preparation (s)
+    total_queue_time: float = 0.0  # waiting for a pooled connection before sending (s)
+    client_counted_requests: int = 0  # requests whose token counts were computed client-side
 
     def __str__(self) -> str:
         """String representation of the Summary instance."""
@@ -70,4 +74,23 @@ class TimeToFirstToken(BaseModel):
             display_name = field.replace('_', ' ').title()
             lines.append(f"{display_name}: {self.model_dump()[field]}")
         lines.append("-" * 40)
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+class HedgingStats(BaseModel):
+    """Tail-latency effect and token cost of hedged requests."""
+    hedged_requests: int
+    hedge_wins: int
+    p99_without_hedging: float
+    p99_with_hedging: float
+    p99_reduction_percent: float
+    extra_tokens: int
+    extra_tokens_percent: float
+
+    def __str__(self) -> str:
+        """String representation of the HedgingStats instance."""
+        lines = ["Hedging:", "-" * 40]
+        for field in self.model_dump():
+            display_name = field.replace('_', ' ').title()
+            lines.append(f"{display_name}: {self.model_dump()[field]}")
+        lines.append("-" * 40)
+        return "\n".join(lines)
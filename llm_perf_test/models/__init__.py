@@ -1,10 +1,21 @@
 from .config import config
-from .Summary import Summary, TokensPerSecond, ResponseTimes, TimeToFirstToken
+from .Summary import Summary, TokensPerSecond, ResponseTimes, TimeToFirstToken, HedgingStats
 from .performance_meterics import PerformanceMetrics
+from .request_cache_stats import RequestCacheStats
+from .client_health import ClientHealth, ClientSample
+from .latency_histogram import LatencyHistogram
+from .distributed_run import AgentSummary, DistributedRun
 
 __all__ = ["config",
            "Summary", 
            "TokensPerSecond", 
            "ResponseTimes", 
            "TimeToFirstToken", 
-           "PerformanceMetrics"]
\ No newline at end of file
+           "HedgingStats",
+           "PerformanceMetrics",
+           "RequestCacheStats",
+           "ClientHealth",
+           "ClientSample",
+           "LatencyHistogram",
+           "AgentSummary",
+           "DistributedRun"]
\ No newline at end of file
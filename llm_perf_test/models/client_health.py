@@ -0,0 +1,38 @@
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ClientSample(BaseModel):
+    """A single load-generator health sample."""
+    elapsed: float  # seconds since monitoring started
+    loop_lag_ms: float
+    cpu_percent: float
+    rss_mb: float
+    in_flight: int
+    tasks: int
+
+
+class ClientHealth(BaseModel):
+    """Load-generator (client) health over a test run."""
+    samples_taken: int
+    mean_loop_lag_ms: float
+    p95_loop_lag_ms: float
+    max_loop_lag_ms: float
+    mean_cpu_percent: float
+    max_cpu_percent: float
+    peak_rss_mb: float
+    max_in_flight: int
+    client_saturated: bool
+    warnings: List[str] = []
+    samples: List[ClientSample] = []
+
+    def __str__(self) -> str:
+        """String representation of the ClientHealth instance."""
+        lines = ["Client Health:", "-" * 40]
+        for field, value in self.model_dump(exclude={"samples"}).items():
+            display_name = field.replace('_', ' ').title()
+            lines.append(f"{display_name}: {value}")
+        lines.append("-" * 40)
+        return "\n".join(lines)
@@ -1,8 +1,9 @@
 import datetime
 import os
+from glob import glob
 
-from pydantic import Field
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import AliasChoices, Field
+from pydantic_settings import BaseSettings, CliImplicitFlag, SettingsConfigDict
 
 from llm_perf_test.log import log
 
@@ -24,11 +25,35 @@ class Config(BaseSettings, case_sensitive=False):
     use_streaming: bool = Field(default=False,alias="LLM_USE_STREAMING", description="Use streaming responses")
     concurrent: int = Field(default=0,alias="LLM_CONCURRENT", description="Number of concurrent requests")
     request_delay_seconds: int = Field(default=0, alias="LLM_REQUEST_DELAY_SECONDS", description="Delay between requests")
-    request_timeout: int = Field(default=6000, alias="LLM_REQUEST_TIMEOUT", description="Request timeout in milliseconds")
+    request_timeout: int = Field(default=6000, alias="LLM_REQUEST_TIMEOUT", description="Overall request timeout in seconds")
+    connect_timeout: float = Field(default=30.0, alias="LLM_CONNECT_TIMEOUT", description="Timeout for establishing a connection in seconds (0 disables)")
+    first_token_timeout: float = Field(default=0.0, alias="LLM_FIRST_TOKEN_TIMEOUT", description="Cancel requests with no first token after this many seconds (0 disables)")
+    chunk_idle_timeout: float = Field(default=0.0, alias="LLM_CHUNK_IDLE_TIMEOUT", description="Cancel streams idle between chunks for this many seconds (0 disables)")
+    hedge_delay_seconds: float = Field(default=0.0, alias="LLM_HEDGE_DELAY_SECONDS", description="Send a duplicate request if no response after this many seconds (0 disables)")
+    hedge_percentile: float = Field(default=0.0, alias="LLM_HEDGE_PERCENTILE", description="Hedge after this percentile of observed latency instead of a fixed delay (0 disables)")
+    hedge_drain_loser: bool = Field(default=False, alias="LLM_HEDGE_DRAIN_LOSER", description="Read the slower hedged copy to completion instead of cancelling it, to measure latency without hedging")
     use_common_prompt: bool = Field(default=False, alias="LLM_USE_COMMON_PROMPT", description="Use a common prompt for all requests")
     output_markdown_path: str = Field(default="", alias="LLM_OUTPUT_MARKDOWN_PATH", description="Path to save Markdown output")
+    result_format: str = Field(default="csv", alias="LLM_RESULT_FORMAT", description="Per-request results file format: csv, parquet or none")
+    report_top_n: int = Field(default=10, alias="LLM_REPORT_TOP_N", description="Number of slowest requests listed in the Markdown report")
     result_dir: str = Field(default="", alias="LLM_RESULT_DIR", description="Directory to save results")
     test_dataset_dir: str = Field(default="", alias="LLM_TEST_DATASET_DIR", description="Path to CSV file or json file with test prompts")
+    monitor_interval_seconds: float = Field(default=1.0, alias="LLM_MONITOR_INTERVAL_SECONDS", description="Interval between load-generator health samples")
+    client_loop_lag_warn_ms: float = Field(default=50.0, alias="LLM_CLIENT_LOOP_LAG_WARN_MS", description="p95 event-loop lag that flags the client as the bottleneck")
+    client_cpu_warn_percent: float = Field(default=90.0, alias="LLM_CLIENT_CPU_WARN_PERCENT", description="Process CPU utilization that flags the client as the bottleneck")
+    checkpoint_interval_seconds: float = Field(default=30.0, alias="LLM_CHECKPOINT_INTERVAL_SECONDS", description="How often completed results are checkpointed to the result directory")
+    resume: CliImplicitFlag[bool] = Field(default=False, validation_alias=AliasChoices("LLM_RESUME", "resume"), description="Resume from the checkpoint in the result directory (latest run if not set)")
+    request_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="LLM_REQUEST_CACHE_MAX_BYTES", description="Upper bound for pre-serialized request bodies kept in memory")
+    mode: str = Field(default="local", alias="LLM_MODE", description="Run mode: local, coordinator or agent")
+    coordinator_host: str = Field(default="127.0.0.1", alias="LLM_COORDINATOR_HOST", description="Coordinator address to listen on / connect to")
+    coordinator_port: int = Field(default=7700, alias="LLM_COORDINATOR_PORT", description="Coordinator TCP port")
+    agents: int = Field(default=1, alias="LLM_AGENTS", description="Number of agents the coordinator waits for")
+    start_delay_seconds: float = Field(default=5.0, alias="LLM_START_DELAY_SECONDS", description="Delay between all agents being ready and the synchronized start")
+    join_timeout_seconds: float = Field(default=300.0, alias="LLM_JOIN_TIMEOUT_SECONDS", description="How long the coordinator waits for all agents to be ready (0 waits forever)")
+    progress_interval_seconds: float = Field(default=5.0, alias="LLM_PROGRESS_INTERVAL_SECONDS", description="How often agents stream metric summaries to the coordinator")
+    agent_upload_rows: bool = Field(default=False, alias="LLM_AGENT_UPLOAD_ROWS", description="Have agents send every per-request row so the coordinator writes a requests_distributed results file")
+    tokenizer: str = Field(default="approximate", alias="LLM_TOKENIZER", description="Client-side token counter used when the endpoint returns no usage: approximate or tiktoken")
+    token_cache_path: str = Field(default="", alias="LLM_TOKEN_CACHE_PATH", description="File where prompt token counts are cached across runs")
     
     def __init__(self, **data):
         super().__init__(**data)
@@ -36,13 +61,24 @@ class Config(BaseSettings, case_sensitive=False):
         analysis_filename = f"analysis_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
         if not self.output_markdown_path:
             self.output_markdown_path = os.path.join(self._setup_analysis_dir(), analysis_filename + ".md")
+        if not self.result_dir and self.resume:
+            self.result_dir = self._latest_results_dir()
         if not self.result_dir:
             # Set result_dir to the directory where the module is running (current working directory)
             self.result_dir = self._setup_results_dir(subdir=analysis_filename)
-        if not self.base_url:
+        if self.mode not in ("local", "coordinator", "agent"):
+            raise ValueError("Mode must be one of: local, coordinator, agent")
+        # The coordinator never calls the endpoint; agents use their own URL and model
+        if not self.base_url and self.mode != "coordinator":
             raise ValueError("Base URL must be provided")
-        if not self.model:
+        if not self.model and self.mode != "coordinator":
             raise ValueError("Model name must be provided")
+        if self.result_format not in ("csv", "parquet", "none"):
+            raise ValueError("Result format must be one of: csv, parquet, none")
+        if self.tokenizer not in ("approximate", "tiktoken"):
+            raise ValueError("Tokenizer must be one of: approximate, tiktoken")
+        if not self.token_cache_path:
+            self.token_cache_path = os.path.join(self._setup_analysis_dir(), "prompt_token_cache.json")
 
     def _setup_results_dir(self, subdir: str = "") -> str:
         """Return the directory where the module is running (current working directory).
@@ -53,6 +89,13 @@ class Config(BaseSettings, case_sensitive=False):
         os.makedirs(result_dir, exist_ok=True)
         return result_dir
 
+    def _latest_results_dir(self) -> str:
+        """Return the most recent CWD/analysis_* results directory holding a checkpoint, or ''."""
+        checkpoints = glob(os.path.join(os.getcwd(), "analysis_*", "checkpoint_*.jsonl"))
+        if not checkpoints:
+            return ""
+        return os.path.dirname(max(checkpoints, key=os.path.getmtime))
+
     def _setup_analysis_dir(self) -> str:  
         cwd = os.getcwd()
         analysis_dir = os.path.join(cwd, "analysis")
@@ -0,0 +1,38 @@
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from .latency_histogram import LatencyHistogram
+
+
+class AgentSummary(BaseModel):
+    """Per-agent outcome of a distributed run."""
+    agent_id: str
+    host: str
+    clock_offset_ms: float  # coordinator clock minus agent clock
+    sync_rtt_ms: float
+    completed: int = 0
+    failed: int = 0
+    stalled: int = 0
+    client_saturated: bool = False
+
+
+class DistributedRun(BaseModel):
+    """Agents and merged latency histograms of a coordinator-driven run."""
+    agents: List[AgentSummary] = []
+    latency: LatencyHistogram = Field(default_factory=LatencyHistogram)
+    time_to_first_token: LatencyHistogram = Field(default_factory=LatencyHistogram)
+
+    def __str__(self) -> str:
+        """String representation of the DistributedRun instance."""
+        lines = ["Distributed Run:", "-" * 40]
+        for agent in self.agents:
+            lines.append(f"{agent.agent_id}@{agent.host}: {agent.completed} ok, {agent.failed} failed, "
+                         f"{agent.stalled} stalled, offset {agent.clock_offset_ms} ms"
+                         f"{', CLIENT SATURATED' if agent.client_saturated else ''}")
+        for name, hist in (("Latency", self.latency), ("TTFT", self.time_to_first_token)):
+            lines.append(f"{name} p50/p90/p99/max (s): {hist.percentile(50):.3f} / {hist.percentile(90):.3f} / "
+                         f"{hist.percentile(99):.3f} / {hist.max:.3f}")
+        lines.append("-" * 40)
+        return "\n".join(lines)
@@ -0,0 +1,60 @@
+
+import math
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class LatencyHistogram(BaseModel):
+    """Mergeable log-bucketed histogram of durations in seconds, accurate to within ``growth``"""
+    growth: float = 1.05
+    min_value: float = 0.001
+    counts: Dict[int, int] = {}
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, value: float) -> None:
+        """Add one duration"""
+        index = 0 if value <= self.min_value else int(math.log(value / self.min_value, self.growth))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add another histogram's counts into this one"""
+        if (other.growth, other.min_value) != (self.growth, self.min_value):
+            raise ValueError("Cannot merge histograms with different bucketing")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile (0-100), reported as the upper bound of its bucket"""
+        if not self.count:
+            return 0.0
+        return self._at_rank(math.ceil(self.count * pct / 100))
+
+    def median(self) -> float:
+        """Approximate median, averaging the two middle values' buckets when the count is even"""
+        if not self.count:
+            return 0.0
+        middle = (self.count + 1) // 2
+        if self.count % 2:
+            return self._at_rank(middle)
+        return (self._at_rank(middle) + self._at_rank(middle + 1)) / 2
+
+    def _at_rank(self, rank: int) -> float:
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.min_value * self.growth ** (index + 1), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
@@ -13,3 +13,12 @@ class PerformanceMetrics(BaseModel):
     request_id: str
     prompt: str = ''  # Optional, default to ''
     reasoning_tokens: int = 0  # Optional, default to 0
+    prepare_time: float = 0.0  # Client-side time spent building headers and body (s)
+    queue_time: float = 0.0  # Wait for a pooled connection (incl. connecting) before sending; excluded from total_time (s)
+    status: str = "ok"  # "ok" or "stalled" (cancelled by a first-token / chunk-idle timeout)
+    stall_phase: str = ''  # "first_token" or "chunk_idle" when stalled
+    hedged: bool = False  # a duplicate request was issued after the hedge delay
+    hedge_won: bool = False  # the duplicate finished first
+    primary_time: float = 0.0  # latency of the original request alone; how long it had run if cancelled (s)
+    hedge_extra_tokens: int = 0  # tokens consumed by the losing copy (its prompt tokens if it was cancelled)
+    token_source: str = "server"  # "server" (usage from the response) or "client" (counted locally)
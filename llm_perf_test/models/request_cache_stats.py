@@ -0,0 +1,33 @@
+
+from pydantic import BaseModel
+
+class RequestCacheStats(BaseModel):
+    """Statistics for the pre-serialized request body cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    cached_bytes: int = 0
+    serialize_time: float = 0.0  # seconds spent encoding bodies (misses only)
+    estimated_time_saved: float = 0.0  # hits * average encode time of a miss (s)
+
+    def since(self, earlier: "RequestCacheStats") -> "RequestCacheStats":
+        """Counters accumulated after the ``earlier`` snapshot; entries and bytes are current."""
+        return RequestCacheStats(
+            hits=self.hits - earlier.hits,
+            misses=self.misses - earlier.misses,
+            evictions=self.evictions - earlier.evictions,
+            entries=self.entries,
+            cached_bytes=self.cached_bytes,
+            serialize_time=self.serialize_time - earlier.serialize_time,
+            estimated_time_saved=self.estimated_time_saved - earlier.estimated_time_saved
+        )
+
+    def __str__(self) -> str:
+        """String representation of the RequestCacheStats instance."""
+        lines = ["Request Cache:", "-" * 40]
+        for field in self.model_dump():
+            display_name = field.replace('_', ' ').title()
+            lines.append(f"{display_name}: {self.model_dump()[field]}")
+        lines.append("-" * 40)
+        return "\n".join(lines)
@@ -0,0 +1,75 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Hashable
+
+from llm_perf_test.models import RequestCacheStats
+
+
+class RequestPreparer:
+    """Prepare request endpoint, headers and JSON bodies once and reuse them"""
+
+    def __init__(self,
+                 base_url: str,
+                 model: str,
+                 api_key: str,
+                 api_version: str = "",
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.model = model
+        self.max_bytes = max_bytes
+        self.endpoint = f"{base_url.rstrip('/')}/chat/completions"
+        if api_version != '' and "api-version" not in self.endpoint:
+            self.endpoint += f"?api-version={api_version}"
+        self.header_template = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+            "api-key": api_key  # For Azure OpenAI compatibility
+        }
+        self.stats = RequestCacheStats()
+        self._bodies: OrderedDict[Hashable, bytes] = OrderedDict()
+
+    def headers(self) -> dict:
+        """Return request headers built from the template with fresh trace ids."""
+        return {**self.header_template,
+                "x-conversation-id": str(uuid.uuid4()),      # custom
+                "x-ms-client-request-id": str(uuid.uuid4())  # Azure trace (GUID)
+                }
+
+    def body(self, prompt: str, temperature: float = 0.0, use_streaming: bool = False) -> bytes:
+        """Return the UTF-8 JSON body for the request, serializing it at most once while cached."""
+        key = (prompt, temperature, use_streaming)
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.estimated_time_saved += self.stats.serialize_time / self.stats.misses
+            return body
+
+        self.stats.misses += 1
+        start = time.perf_counter()
+        body = json.dumps(self._build_payload(prompt, temperature, use_streaming)).encode("utf-8")
+        self.stats.serialize_time += time.perf_counter() - start
+
+        if len(body) <= self.max_bytes:
+            self._bodies[key] = body
+            self.stats.cached_bytes += len(body)
+            while self.stats.cached_bytes > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self.stats.cached_bytes -= len(evicted)
+                self.stats.evictions += 1
+        self.stats.entries = len(self._bodies)
+        return body
+
+    def _build_payload(self, prompt: str, temperature: float, use_streaming: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "stream": use_streaming
+        }
+        if use_streaming:
+            payload["stream_options"] = {"include_usage": True}  # Request usage in streaming
+        return payload
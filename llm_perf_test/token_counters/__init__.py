@@ -0,0 +1,9 @@
+from .base_token_counter import TokenCounter
+from .approximate_token_counter import ApproximateTokenCounter
+from .tiktoken_token_counter import TiktokenTokenCounter
+from .cached_token_counter import CachedTokenCounter
+
+__all__ = ["TokenCounter",
+           "ApproximateTokenCounter",
+           "TiktokenTokenCounter",
+           "CachedTokenCounter"]
@@ -0,0 +1,15 @@
+import re
+
+from llm_perf_test.token_counters import TokenCounter
+
+
+class ApproximateTokenCounter(TokenCounter):
+    """Cheap tokenizer-free estimate: one token per word or punctuation mark, or per ``bytes_per_token`` UTF-8 bytes of longer words"""
+    _pieces = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, bytes_per_token: int = 4):
+        self.bytes_per_token = bytes_per_token
+        self.name = f"approximate-{bytes_per_token}"
+
+    def count(self, text: str) -> int:
+        return sum(-(-len(piece.encode("utf-8")) // self.bytes_per_token) for piece in self._pieces.findall(text))
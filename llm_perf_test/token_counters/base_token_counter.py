@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+
+
+class TokenCounter(ABC):
+    """Abstract base class for client-side token counters, used when the endpoint reports no usage"""
+    name: str = ""  # identifies the tokenizer in cache keys; counts from different tokenizers never mix
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Return the number of tokens in text"""
+        pass
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+from typing import Dict
+
+from llm_perf_test import log
+from llm_perf_test.token_counters import TokenCounter
+
+
+class CachedTokenCounter(TokenCounter):
+    """TokenCounter that memoizes another counter's results on disk, keyed by tokenizer name and content hash"""
+
+    def __init__(self, counter: TokenCounter, path: str = ""):
+        self.counter = counter
+        self.name = counter.name
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._counts: Dict[str, int] = self._load()
+        self._new: Dict[str, int] = {}
+
+    def _key(self, text: str) -> str:
+        return f"{self.name}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def _load(self) -> Dict[str, int]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log(f"Ignoring unreadable token cache {self.path}: {str(e)}", "warning")
+            return {}
+
+    def count(self, text: str) -> int:
+        key = self._key(text)
+        tokens = self._counts.get(key)
+        if tokens is not None:
+            self.hits += 1
+            return tokens
+        self.misses += 1
+        tokens = self._counts[key] = self._new[key] = self.counter.count(text)
+        return tokens
+
+    def save(self) -> None:
+        """Merge newly counted entries into the cache file"""
+        if not self.path or not self._new:
+            return
+        counts = self._load()
+        counts.update(self._new)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(counts, f)
+        os.replace(tmp_path, self.path)
+        self._counts.update(counts)
+        self._new = {}
+        log(f"Token cache saved to {self.path} ({len(counts)} entries, {self.hits} hits / {self.misses} misses this run)")
@@ -0,0 +1,19 @@
+from llm_perf_test.token_counters import TokenCounter
+
+
+class TiktokenTokenCounter(TokenCounter):
+    """Exact counts for OpenAI-family models using tiktoken (optional dependency)"""
+
+    def __init__(self, model: str, fallback_encoding: str = "cl100k_base"):
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ImportError("The tiktoken tokenizer requires tiktoken: pip install tiktoken") from e
+        try:
+            self._encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self._encoding = tiktoken.get_encoding(fallback_encoding)
+        self.name = f"tiktoken-{self._encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,7 @@
+from .base_result_writer import ResultWriter
+from .csv_result_writer import CsvResultWriter
+from .parquet_result_writer import ParquetResultWriter
+
+__all__ = ["ResultWriter",
+           "CsvResultWriter",
+           "ParquetResultWriter"]
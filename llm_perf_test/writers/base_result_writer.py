@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from llm_perf_test.models import PerformanceMetrics
+
+
+class ResultWriter(ABC):
+    """Abstract base class for writers that stream per-request metrics to disk as they complete"""
+    columns = ["request_id", "prompt_size_kb", "total_tokens", "prompt_tokens", "completion_tokens",
+               "reasoning_tokens", "total_time", "tokens_per_second", "time_to_first_token", "prepare_time", "queue_time",
+               "status", "stall_phase", "hedged", "hedge_won", "primary_time", "hedge_extra_tokens",
+               "token_source"]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+
+    @classmethod
+    def to_row(cls, metrics: PerformanceMetrics) -> dict:
+        """Flatten PerformanceMetrics into a row; the prompt is reduced to its size"""
+        row = metrics.model_dump(include=set(cls.columns))
+        row["prompt_size_kb"] = round(len(metrics.prompt.encode("utf-8")) / 1024, 2)
+        return {column: row.get(column) for column in cls.columns}
+
+    @abstractmethod
+    def write(self, metrics: PerformanceMetrics) -> None:
+        """Write a single completed request"""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush buffered rows and release the file"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
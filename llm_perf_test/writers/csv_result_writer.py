@@ -0,0 +1,24 @@
+import csv
+
+from llm_perf_test.models import PerformanceMetrics
+from llm_perf_test.writers import ResultWriter
+
+
+class CsvResultWriter(ResultWriter):
+    """Stream per-request metrics to a CSV file, one flushed row per completed request"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+        self._writer.writeheader()
+        self._file.flush()
+
+    def write(self, metrics: PerformanceMetrics) -> None:
+        self._writer.writerow(self.to_row(metrics))
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,55 @@
+from llm_perf_test.models import PerformanceMetrics
+from llm_perf_test.writers import ResultWriter
+
+
+class ParquetResultWriter(ResultWriter):
+    """Stream per-request metrics to a Parquet file in row groups of ``batch_size`` rows (requires pyarrow)"""
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self.batch_size = batch_size
+        self._schema = pa.schema([
+            ("request_id", pa.string()),
+            ("prompt_size_kb", pa.float64()),
+            ("total_tokens", pa.int64()),
+            ("prompt_tokens", pa.int64()),
+            ("completion_tokens", pa.int64()),
+            ("reasoning_tokens", pa.int64()),
+            ("total_time", pa.float64()),
+            ("tokens_per_second", pa.float64()),
+            ("time_to_first_token", pa.float64()),
+            ("prepare_time", pa.float64()),
+            ("queue_time", pa.float64()),
+            ("status", pa.string()),
+            ("stall_phase", pa.string()),
+            ("hedged", pa.bool_()),
+            ("hedge_won", pa.bool_()),
+            ("primary_time", pa.float64()),
+            ("hedge_extra_tokens", pa.int64()),
+            ("token_source", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._batch: list[dict] = []
+
+    def write(self, metrics: PerformanceMetrics) -> None:
+        self._batch.append(self.to_row(metrics))
+        self.rows_written += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._batch:
+            self._writer.write_table(self._pa.Table.from_pylist(self._batch, schema=self._schema))
+            self._batch = []
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
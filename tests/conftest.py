@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# llm_perf_test.models.config loads settings from the environment and CLI at import time and
+# creates output directories; point it at a scratch directory and keep pytest's argv away from it.
+_scratch = tempfile.mkdtemp(prefix="llm_perf_test_")
+os.environ.setdefault("LLM_URL", "http://127.0.0.1:9/v1")
+os.environ.setdefault("LLM_MODEL", "test-model")
+os.environ.setdefault("LLM_RESULT_DIR", _scratch)
+os.environ.setdefault("LLM_OUTPUT_MARKDOWN_PATH", os.path.join(_scratch, "analysis.md"))
+os.environ.setdefault("LLM_TOKEN_CACHE_PATH", os.path.join(_scratch, "prompt_token_cache.json"))
+sys.argv = sys.argv[:1]
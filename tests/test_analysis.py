@@ -0,0 +1,80 @@
+import json
+import random
+from statistics import mean, median, stdev
+
+import pytest
+
+from llm_perf_test import Analysis, AnalysisAccumulator
+from llm_perf_test.models import PerformanceMetrics
+
+
+def make_metrics(i: int, total_time: float, status: str = "ok") -> PerformanceMetrics:
+    return PerformanceMetrics(total_tokens=100, prompt_tokens=60, completion_tokens=40, total_time=total_time,
+                              tokens_per_second=100 / total_time, time_to_first_token=total_time / 2,
+                              request_id=f"r{i}", status=status)
+
+
+def test_accumulator_matches_exact_statistics():
+    rng = random.Random(7)
+    results = [make_metrics(i, rng.uniform(0.1, 5.0)) for i in range(500)]
+    analysis = Analysis.from_results(results, top_n=5)
+    times = [r.total_time for r in results]
+
+    assert analysis.summary.total_requests == 500
+    assert analysis.summary.total_tokens == 50_000
+    assert analysis.response_times.mean == pytest.approx(mean(times), abs=0.01)
+    assert analysis.response_times.std_dev == pytest.approx(stdev(times), abs=0.01)
+    assert analysis.response_times.min == round(min(times), 2)
+    assert analysis.response_times.max == round(max(times), 2)
+    assert analysis.response_times.median == pytest.approx(median(times), rel=0.02)
+    assert [r.request_id for r in analysis.slowest_requests] == \
+        [r.request_id for r in sorted(results, key=lambda r: r.total_time, reverse=True)[:5]]
+
+
+def test_stalled_requests_are_counted_but_not_measured():
+    accumulator = AnalysisAccumulator(top_n=3)
+    for i, t in enumerate([1.0, 1.0, 30.0]):
+        accumulator.add(make_metrics(i, t, status="stalled" if t > 10 else "ok"))
+    analysis = accumulator.build()
+    assert analysis.summary.stalled_requests == 1
+    assert analysis.summary.successful_requests == 2
+    assert analysis.response_times.max == 1.0
+    assert analysis.slowest_requests[0].status == "stalled"
+    assert [r.request_id for r in analysis.slowest_requests[1:]] == ["r0", "r1"]  # ties keep arrival order
+
+
+def test_empty_accumulator_builds_nothing():
+    assert AnalysisAccumulator().build() is None
+
+
+@pytest.mark.parametrize("times", [[1.0, 3.0], [2.0, 10.0, 11.0, 30.0], [4.0, 1.0, 2.0]])
+def test_median_is_exact_for_small_runs(times):
+    analysis = Analysis.from_results([make_metrics(i, t) for i, t in enumerate(times)])
+    assert analysis.response_times.median == round(median(times), 2)
+    assert analysis.tokens_per_second.median == round(median(100 / t for t in times), 2)
+
+
+def test_median_falls_back_to_interpolating_histogram(monkeypatch):
+    monkeypatch.setattr("llm_perf_test.analysis._RunningStats.exact_limit", 3)
+    analysis = Analysis.from_results([make_metrics(i, t) for i, t in enumerate([2.0, 10.0, 11.0, 30.0])])
+    assert analysis.response_times.median == pytest.approx(10.5, rel=0.01)
+
+
+def test_merged_states_match_a_single_accumulator():
+    rng = random.Random(3)
+    results = [make_metrics(i, rng.uniform(0.1, 5.0), status="stalled" if i % 17 == 0 else "ok") for i in range(300)]
+    single, parts = AnalysisAccumulator(top_n=5), [AnalysisAccumulator(top_n=5) for _ in range(3)]
+    for i, r in enumerate(results):
+        single.add(r)
+        parts[i % 3].add(r)
+    merged = AnalysisAccumulator(top_n=5)
+    for part in parts:
+        state = json.loads(json.dumps(part.state()))  # as sent by an agent
+        merged.merge(AnalysisAccumulator.from_state(state, prompts={}))
+
+    expected, analysis = single.build(), merged.build()
+    assert analysis.summary == expected.summary
+    assert analysis.response_times == expected.response_times
+    assert analysis.tokens_per_second == expected.tokens_per_second
+    assert analysis.time_to_first_token == expected.time_to_first_token
+    assert [r.request_id for r in analysis.slowest_requests] == [r.request_id for r in expected.slowest_requests]
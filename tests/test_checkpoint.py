@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.models import PerformanceMetrics
+
+PROMPTS = ["alpha", "beta", "gamma", "delta"]
+
+
+def make_metrics(i: int) -> PerformanceMetrics:
+    return PerformanceMetrics(total_tokens=10, prompt_tokens=6, completion_tokens=4, total_time=0.5,
+                              tokens_per_second=20, time_to_first_token=0.1, request_id=f"r{i}")
+
+
+def record(checkpoint: Checkpoint, *indices: int) -> None:
+    for i in indices:
+        checkpoint.record(i, PROMPTS[i], make_metrics(i))
+    checkpoint.flush()
+
+
+def test_load_restores_completed_results(tmp_path):
+    record(Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS)), 0, 2)
+    checkpoint = Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS))
+    assert checkpoint.load(PROMPTS) == {0, 2}
+    assert [(i, m.request_id, m.prompt) for i, m in checkpoint.restored(PROMPTS)] == \
+        [(0, "r0", "alpha"), (2, "r2", "gamma")]
+    state = json.loads((tmp_path / "checkpoint_sequential.json").read_text())
+    assert state["completed"] == 2 and state["next_index"] == 1
+
+
+def test_torn_last_line_does_not_swallow_the_next_record(tmp_path):
+    record(Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS)), 0)
+    path = tmp_path / "checkpoint_sequential.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"index": 1, "prompt_hash": "')  # hard crash mid-write
+
+    resumed = Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS))
+    assert resumed.load(PROMPTS) == {0}
+    record(resumed, 2, 3)
+
+    assert Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS)).load(PROMPTS) == {0, 2, 3}
+
+
+def test_records_for_changed_prompts_are_rerun(tmp_path):
+    record(Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS)), 0, 1)
+    changed = ["alpha", "BETA", "gamma", "delta"]
+    checkpoint = Checkpoint(str(tmp_path), "sequential", total=len(changed))
+    assert checkpoint.load(changed) == {0}
+    assert checkpoint.mismatched == 1
+
+
+def test_reset_discards_previous_run(tmp_path):
+    record(Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS)), 0)
+    checkpoint = Checkpoint(str(tmp_path), "sequential", total=len(PROMPTS))
+    checkpoint.reset()
+    assert checkpoint.load(PROMPTS) == set()
+
+
+def test_buffered_record_is_flushed_without_a_later_record(tmp_path):
+    async def scenario():
+        async with Checkpoint(str(tmp_path), "concurrent", total=len(PROMPTS), interval_seconds=0.05) as checkpoint:
+            checkpoint.record(0, PROMPTS[0], make_metrics(0))  # inside the interval: only buffered
+            await asyncio.sleep(0.2)
+            return Checkpoint(str(tmp_path), "concurrent", total=len(PROMPTS)).load(PROMPTS)
+
+    assert asyncio.run(scenario()) == {0}
@@ -0,0 +1,43 @@
+from llm_perf_test import ClientMonitor
+from llm_perf_test.models import ClientSample
+
+
+def make_monitor(lags, cpus) -> ClientMonitor:
+    monitor = ClientMonitor(loop_lag_warn_ms=50.0, cpu_warn_percent=90.0)
+    monitor.samples = [ClientSample(elapsed=i, loop_lag_ms=lag, cpu_percent=cpu, rss_mb=100.0, in_flight=i, tasks=1)
+                       for i, (lag, cpu) in enumerate(zip(lags, cpus))]
+    return monitor
+
+
+def test_no_warnings_for_healthy_client():
+    health = make_monitor([1.0] * 20, [20.0] * 20).summarize()
+    assert not health.client_saturated and health.warnings == []
+    assert health.samples_taken == 20 and health.max_in_flight == 19
+
+
+def test_p95_loop_lag_at_threshold_warns():
+    health = make_monitor([0.0] * 18 + [50.0] * 2, [20.0] * 20).summarize()
+    assert health.p95_loop_lag_ms >= 50.0
+    assert health.client_saturated
+    assert len(health.warnings) == 1 and "event-loop lag" in health.warnings[0]
+
+
+def test_occasional_lag_spike_does_not_warn():
+    health = make_monitor([0.0] * 19 + [500.0], [20.0] * 20).summarize()
+    assert health.max_loop_lag_ms == 500.0
+    assert not health.client_saturated
+
+
+def test_cpu_warns_only_when_busy_in_more_than_half_the_samples():
+    assert not make_monitor([0.0] * 4, [95.0, 95.0, 10.0, 10.0]).summarize().client_saturated
+    health = make_monitor([0.0] * 5, [95.0, 90.0, 99.0, 10.0, 10.0]).summarize()
+    assert health.client_saturated
+    assert len(health.warnings) == 1 and "3/5 samples" in health.warnings[0]
+
+
+def test_zero_samples():
+    health = ClientMonitor().summarize()
+    assert health.samples_taken == 0
+    assert (health.mean_loop_lag_ms, health.p95_loop_lag_ms, health.max_cpu_percent) == (0.0, 0.0, 0.0)
+    assert health.max_in_flight == 0 and health.peak_rss_mb >= 0
+    assert not health.client_saturated
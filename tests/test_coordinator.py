@@ -0,0 +1,155 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from aiohttp import web
+
+from llm_perf_test import AnalysisAccumulator, LLMPerformanceTester
+from llm_perf_test.checkpoint import Checkpoint
+from llm_perf_test.distributed import Agent, Coordinator
+from llm_perf_test.distributed.protocol import read_message, send_message
+from llm_perf_test.models import LatencyHistogram, PerformanceMetrics
+from llm_perf_test.writers import ResultWriter
+
+PROMPTS = ["alpha", "beta"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def fake_agent(port: int, agent_id: str) -> str:
+    """Speak the agent side of the protocol, reporting every prompt as completed in 0.5 s"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await send_message(writer, "hello", agent_id=agent_id, host="test")
+    await send_message(writer, "sync", t0=time.time())
+    await read_message(reader, "sync")
+    await send_message(writer, "ready", offset=0.0, rtt=0.001)
+    message = await read_message(reader)
+    if message["type"] == "workload":
+        latency = LatencyHistogram()
+        accumulator = AnalysisAccumulator(top_n=message["top_n"])
+        rows = []
+        for i, prompt in enumerate(message["prompts"]):
+            metrics = PerformanceMetrics(total_tokens=10, prompt_tokens=6, completion_tokens=4, total_time=0.5 + i,
+                                         tokens_per_second=20, time_to_first_token=0.1, request_id=f"{agent_id}-{i}",
+                                         prompt=prompt)
+            latency.record(metrics.total_time)
+            accumulator.add(metrics)
+            rows.append({"prompt_hash": Checkpoint.prompt_hash(prompt), "metrics": metrics.model_dump(exclude={"prompt"})})
+        if message["upload_rows"]:
+            await send_message(writer, "results", rows=rows)
+        await send_message(writer, "progress", completed=len(rows), stalled=0, in_flight=0,
+                           latency=latency.model_dump(), time_to_first_token=latency.model_dump())
+        await send_message(writer, "done", failed=0, client_health=None, analysis=accumulator.state())
+    writer.close()
+    return message["type"]
+
+
+class ListWriter(ResultWriter):
+    def __init__(self):
+        super().__init__(path="")
+        self.rows = []
+
+    def write(self, metrics: PerformanceMetrics) -> None:
+        self.rows.append(metrics)
+
+    def close(self) -> None:
+        pass
+
+
+async def probe(port: int, send_hello: bool) -> None:
+    """A port scan or health check: connect, maybe start the handshake, then drop"""
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    if send_hello:
+        await send_message(writer, "hello", agent_id="probe", host="test")
+    writer.close()
+
+
+def test_dropped_connections_do_not_take_agent_slots():
+    async def scenario():
+        port = free_port()
+        coordinator = Coordinator("127.0.0.1", port, expected_agents=2, start_delay=0, progress_interval=60, join_timeout=5)
+        run = asyncio.create_task(coordinator.run(PROMPTS, concurrent=1, request_timeout=10))
+        await asyncio.sleep(0.1)
+        await probe(port, send_hello=False)
+        await probe(port, send_hello=True)
+        await asyncio.sleep(0.1)
+        agents = await asyncio.gather(fake_agent(port, "a1"), fake_agent(port, "a2"))
+        return agents, await asyncio.wait_for(run, 5)
+
+    agents, analysis = asyncio.run(scenario())
+    assert agents == ["workload", "workload"]
+    assert analysis.summary.total_requests == 4
+    assert sorted(a.agent_id for a in analysis.distributed.agents) == ["a1", "a2"]
+    assert analysis.distributed.latency.count == 4
+    assert analysis.response_times.max == 1.5
+    assert {r.prompt for r in analysis.slowest_requests} == set(PROMPTS)
+
+
+def test_rows_are_uploaded_only_for_a_results_file():
+    async def scenario(writer):
+        port = free_port()
+        coordinator = Coordinator("127.0.0.1", port, expected_agents=1, start_delay=0, progress_interval=60)
+        run = asyncio.create_task(coordinator.run(PROMPTS, concurrent=1, request_timeout=10, result_writer=writer))
+        await asyncio.sleep(0.1)
+        await fake_agent(port, "a1")
+        return await asyncio.wait_for(run, 5)
+
+    writer = ListWriter()
+    analysis = asyncio.run(scenario(writer))
+    assert [r.prompt for r in writer.rows] == PROMPTS
+    assert analysis.summary.total_requests == 2  # built from the summary, not from the rows as well
+
+    assert asyncio.run(scenario(None)).summary.total_requests == 2
+
+
+def test_run_aborts_when_agents_are_not_ready_in_time():
+    async def scenario():
+        port = free_port()
+        coordinator = Coordinator("127.0.0.1", port, expected_agents=2, start_delay=0, join_timeout=0.5)
+        run = asyncio.create_task(coordinator.run(PROMPTS, concurrent=1, request_timeout=10))
+        await asyncio.sleep(0.1)
+        agent = await fake_agent(port, "a1")
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(run, 5)
+        return agent
+
+    assert asyncio.run(scenario()) == "abort"
+
+
+def test_agents_report_summaries_to_the_coordinator():
+    async def chat(request):
+        return web.json_response({"id": "r", "choices": [{"message": {"content": "ok"}}],
+                                  "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        port = free_port()
+        try:
+            coordinator = Coordinator("127.0.0.1", port, expected_agents=2, start_delay=0, progress_interval=60)
+            run = asyncio.create_task(coordinator.run(PROMPTS * 3, concurrent=2, request_timeout=10, top_n=2))
+            await asyncio.sleep(0.1)
+            agents = [Agent(LLMPerformanceTester(base_url=url, api_key="k", model="m"), "127.0.0.1", port,
+                            agent_id=f"a{i}", progress_interval=0.05) for i in range(2)]
+            await asyncio.gather(*(agent.run() for agent in agents))
+            return await asyncio.wait_for(run, 5)
+        finally:
+            await runner.cleanup()
+
+    analysis = asyncio.run(scenario())
+    assert analysis.summary.total_requests == 12
+    assert analysis.summary.total_tokens == 12 * 15
+    assert [a.completed for a in analysis.distributed.agents] == [6, 6]
+    assert len(analysis.slowest_requests) == 2
+    assert all(r.prompt in PROMPTS for r in analysis.slowest_requests)
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from llm_perf_test import AnalysisAccumulator, LLMPerformanceTester
+
+
+async def run_against_server(latency, prompts, concurrent, **tester_kwargs):
+    """Serve chat completions with latency(prompt, attempt) seconds and run a concurrent test against them"""
+    calls = Counter()
+
+    async def chat(request):
+        prompt = (await request.json())["messages"][0]["content"]
+        calls[prompt] += 1
+        await asyncio.sleep(latency(prompt, calls[prompt]))
+        return web.json_response({"id": "r", "choices": [{"message": {"content": "ok"}}],
+                                  "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat)
+    runner = web.AppRunner(app, handler_cancellation=True)  # stop serving copies the client cancelled
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        tester = LLMPerformanceTester(base_url=f"http://127.0.0.1:{port}/v1", api_key="k", model="m", **tester_kwargs)
+        accumulator = AnalysisAccumulator()
+        completed = await tester.concurrent_test(prompts, concurrent_requests=concurrent, request_timeout=30,
+                                                 accumulator=accumulator)
+        return completed, accumulator, sum(calls.values())
+    finally:
+        await runner.cleanup()
+
+
+def test_time_queued_for_a_connection_does_not_trigger_hedges():
+    prompts = [f"p{i}" for i in range(20)]
+    completed, accumulator, calls = asyncio.run(
+        run_against_server(lambda prompt, attempt: 0.05, prompts, concurrent=1, hedge_delay_seconds=0.15))
+    assert completed == 20
+    assert accumulator.hedged_requests == 0
+    assert calls == 20
+    assert accumulator.total_queue_time > 0  # later requests did wait for one of the two connections
+
+
+def test_percentile_hedging_applies_to_requests_scheduled_before_enough_completions():
+    # 40 fast requests establish the percentile; the first attempt of each slow prompt then stalls.
+    # The pool (2 x concurrency) leaves room for the hedges next to the 5 slow primaries.
+    prompts = [f"fast{i}" for i in range(40)] + [f"slow{i}" for i in range(5)]
+
+    def latency(prompt, attempt):
+        return 1.0 if prompt.startswith("slow") and attempt == 1 else 0.01
+
+    completed, accumulator, calls = asyncio.run(
+        run_against_server(latency, prompts, concurrent=5, hedge_percentile=90))
+    assert completed == 45
+    assert accumulator.hedged_requests >= 5
+    assert accumulator.hedge_wins >= 5
+    assert calls == 45 + accumulator.hedged_requests
+
+
+def slow_first_attempt(prompt, attempt):
+    return 2.0 if attempt == 1 else 0.01
+
+
+def test_losing_copy_is_cancelled_when_the_hedge_wins():
+    started = time.monotonic()
+    completed, accumulator, calls = asyncio.run(
+        run_against_server(slow_first_attempt, ["p0", "p1"], concurrent=2, hedge_delay_seconds=0.1))
+    assert time.monotonic() - started < 1.5  # the slow primaries were not awaited
+    assert completed == 2 and calls == 4
+    assert accumulator.hedge_wins == 2
+    assert accumulator.hedge_extra_tokens == 2 * 10  # the cancelled copy's prompt tokens
+    analysis = accumulator.build()
+    assert analysis.response_times.max < 0.5
+
+
+def test_draining_the_loser_measures_latency_without_hedging():
+    completed, accumulator, _ = asyncio.run(
+        run_against_server(slow_first_attempt, ["p0"], concurrent=1, hedge_delay_seconds=0.1, hedge_drain_loser=True))
+    assert completed == 1 and accumulator.hedge_wins == 1
+    assert accumulator.hedge_extra_tokens == 15  # the full loser
+    assert accumulator.build().hedging.p99_without_hedging >= 2.0
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from llm_perf_test.models import LatencyHistogram
+
+
+def exact_percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+def test_percentiles_are_within_one_bucket():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(-1, 1) for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for pct in (50, 90, 99):
+        exact = exact_percentile(values, pct)
+        assert exact <= histogram.percentile(pct) <= exact * histogram.growth
+    assert histogram.percentile(100) == max(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+
+
+def test_merge_equals_recording_everything_in_one_histogram():
+    rng = random.Random(2)
+    values = [rng.uniform(0.0, 3.0) for _ in range(1000)]
+    combined, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        combined.record(value)
+        (first if i % 3 else second).record(value)
+    first.merge(second)
+    assert first.counts == combined.counts
+    assert (first.count, first.max) == (combined.count, combined.max)
+    assert first.percentile(99) == combined.percentile(99)
+
+
+def test_merge_survives_serialization():
+    histogram = LatencyHistogram()
+    histogram.record(0.25)
+    restored = LatencyHistogram(**histogram.model_dump(mode="json"))  # dict keys become strings on the wire
+    restored.merge(histogram)
+    assert restored.count == 2 and restored.percentile(50) == histogram.percentile(50)
+
+
+def test_merge_rejects_different_bucketing():
+    with pytest.raises(ValueError):
+        LatencyHistogram().merge(LatencyHistogram(growth=1.01))
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_median_interpolates_for_even_counts():
+    histogram = LatencyHistogram(growth=1.01)
+    for value in (2.0, 10.0, 11.0, 30.0):
+        histogram.record(value)
+    assert histogram.median() == pytest.approx(10.5, rel=0.01)
+    histogram.record(12.0)
+    assert histogram.median() == pytest.approx(11.0, rel=0.01)
+    assert LatencyHistogram().median() == 0.0
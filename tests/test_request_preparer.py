@@ -0,0 +1,55 @@
+import json
+
+from llm_perf_test import RequestPreparer
+
+
+def make_preparer(max_bytes: int = 256 * 1024 * 1024) -> RequestPreparer:
+    return RequestPreparer(base_url="http://localhost/v1/", model="m", api_key="k", max_bytes=max_bytes)
+
+
+def test_body_is_serialized_once():
+    preparer = make_preparer()
+    first = preparer.body("hello", use_streaming=True)
+    assert preparer.body("hello", use_streaming=True) is first
+    assert json.loads(first)["stream_options"] == {"include_usage": True}
+    assert (preparer.stats.hits, preparer.stats.misses) == (1, 1)
+
+
+def test_body_cache_evicts_least_recently_used():
+    size = len(make_preparer().body("a"))
+    preparer = make_preparer(max_bytes=2 * size)
+    preparer.body("a")
+    preparer.body("b")
+    preparer.body("a")  # "b" is now least recently used
+    preparer.body("c")
+    assert preparer.stats.evictions == 1
+    assert preparer.stats.entries == 2
+    assert preparer.stats.cached_bytes <= 2 * size
+    preparer.body("a")
+    assert preparer.stats.misses == 3  # "a" survived the eviction
+    preparer.body("b")
+    assert preparer.stats.misses == 4
+
+
+def test_oversized_body_is_not_cached():
+    preparer = make_preparer(max_bytes=10)
+    preparer.body("a prompt larger than ten bytes")
+    assert preparer.stats.entries == 0 and preparer.stats.cached_bytes == 0
+
+
+def test_stats_since_snapshot():
+    preparer = make_preparer()
+    preparer.body("a")
+    snapshot = preparer.stats.model_copy()
+    preparer.body("a")
+    preparer.body("b")
+    phase = preparer.stats.since(snapshot)
+    assert (phase.hits, phase.misses, phase.entries) == (1, 1, 2)
+
+
+def test_headers_have_independent_trace_ids():
+    preparer = make_preparer()
+    first, second = preparer.headers(), preparer.headers()
+    assert first["x-conversation-id"] != first["x-ms-client-request-id"]
+    assert first["x-conversation-id"] != second["x-conversation-id"]
+    assert first["Authorization"] == "Bearer k"
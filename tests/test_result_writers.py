@@ -0,0 +1,45 @@
+import csv
+
+import pytest
+
+from llm_perf_test.models import PerformanceMetrics
+from llm_perf_test.writers import CsvResultWriter, ParquetResultWriter, ResultWriter
+
+RESULTS = [
+    PerformanceMetrics(prompt="x" * 2048, total_tokens=100, prompt_tokens=60, completion_tokens=40, total_time=1.5,
+                       tokens_per_second=66.67, time_to_first_token=0.25, request_id="r0", queue_time=0.1),
+    PerformanceMetrics(prompt="y", total_tokens=0, prompt_tokens=0, completion_tokens=0, total_time=30.0,
+                       tokens_per_second=0, time_to_first_token=0, request_id="r1", status="stalled",
+                       stall_phase="chunk_idle", hedged=True, primary_time=31.0, token_source="client"),
+]
+
+
+def test_csv_round_trip(tmp_path):
+    path = str(tmp_path / "requests.csv")
+    with CsvResultWriter(path) as writer:
+        for r in RESULTS:
+            writer.write(r)
+    assert writer.rows_written == 2
+
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ResultWriter.columns
+    assert [row["request_id"] for row in rows] == ["r0", "r1"]
+    assert float(rows[0]["prompt_size_kb"]) == 2.0
+    assert int(rows[0]["completion_tokens"]) == 40 and float(rows[0]["queue_time"]) == 0.1
+    assert (rows[1]["status"], rows[1]["stall_phase"], rows[1]["hedged"]) == ("stalled", "chunk_idle", "True")
+    assert rows[0]["stall_phase"] == ""
+
+
+def test_parquet_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "requests.parquet")
+    with ParquetResultWriter(path, batch_size=1) as writer:
+        for r in RESULTS:
+            writer.write(r)
+
+    table = pq.read_table(path)
+    assert table.column_names == ResultWriter.columns
+    rows = table.to_pylist()
+    assert rows == [ResultWriter.to_row(r) for r in RESULTS]
+    assert rows[1]["stall_phase"] == "chunk_idle" and rows[1]["hedged"] is True
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from llm_perf_test import LLMPerformanceTester
+
+
+def sse(data) -> bytes:
+    return f"data: {json.dumps(data) if isinstance(data, dict) else data}\n\n".encode("utf-8")
+
+
+def chunk(content: str) -> dict:
+    return {"id": "r", "choices": [{"delta": {"content": content}}]}
+
+
+async def request_from_server(handler, prompt="hello", use_streaming=True, **tester_kwargs):
+    """Serve chat completions with ``handler`` and send one request to it"""
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app, handler_cancellation=True)  # abandoned responses stop being served
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        tester = LLMPerformanceTester(base_url=f"http://127.0.0.1:{port}/v1", api_key="k", model="m", **tester_kwargs)
+        async with tester.create_session(aiohttp.TCPConnector(), tester.client_timeout(30)) as session:
+            return await tester.single_request(session, prompt, use_streaming=use_streaming)
+    finally:
+        await runner.cleanup()
+
+
+def test_slow_headers_stall_on_first_token():
+    async def handler(request):
+        await asyncio.sleep(2.0)
+        return web.json_response({})
+
+    metrics = asyncio.run(request_from_server(handler, first_token_timeout=0.3))
+    assert metrics.status == "stalled"
+    assert metrics.stall_phase == "first_token"
+    assert metrics.total_time == pytest.approx(0.3, abs=0.15)
+
+
+def test_pause_mid_stream_stalls_on_chunk_idle():
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(sse(chunk("Hello")))
+        await asyncio.sleep(2.0)
+        await response.write(sse("[DONE]"))
+        return response
+
+    metrics = asyncio.run(request_from_server(handler, first_token_timeout=1.0, chunk_idle_timeout=0.3))
+    assert metrics.status == "stalled"
+    assert metrics.stall_phase == "chunk_idle"
+    assert metrics.total_time == pytest.approx(0.3, abs=0.15)
+    assert metrics.time_to_first_token < 0.15
+
+
+def test_stream_without_usage_is_counted_client_side():
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for content in ("Hello", " there", ", world."):
+            await response.write(sse(chunk(content)))
+        await response.write(sse("[DONE]"))
+        return response
+
+    metrics = asyncio.run(request_from_server(handler, prompt="a cat, a dog."))
+    assert metrics.status == "ok"
+    assert metrics.token_source == "client"
+    assert (metrics.prompt_tokens, metrics.completion_tokens) == (6, 8)  # "Hello there, world."
+    assert metrics.total_tokens == 14 and metrics.tokens_per_second > 0
+
+
+def test_stalled_stream_counts_the_partial_content():
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(sse(chunk("Hello there")))
+        await asyncio.sleep(2.0)
+        return response
+
+    metrics = asyncio.run(request_from_server(handler, prompt="a cat, a dog.", chunk_idle_timeout=0.3))
+    assert metrics.status == "stalled"
+    assert metrics.token_source == "client"
+    assert (metrics.prompt_tokens, metrics.completion_tokens, metrics.total_tokens) == (6, 4, 10)
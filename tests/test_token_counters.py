@@ -0,0 +1,57 @@
+from llm_perf_test.token_counters import ApproximateTokenCounter, CachedTokenCounter, TokenCounter
+
+
+class CountingTokenCounter(TokenCounter):
+    name = "words"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+def test_approximate_counts_words_punctuation_and_long_words():
+    counter = ApproximateTokenCounter()
+    assert counter.count("") == 0
+    assert counter.count("a cat, a dog.") == 6
+    assert counter.count("internationalization") == 5  # 20 bytes / 4
+
+
+def test_cache_persists_counts_across_runs(tmp_path):
+    path = str(tmp_path / "cache" / "prompt_tokens.json")
+    inner = CountingTokenCounter()
+    first = CachedTokenCounter(inner, path)
+    assert first.count("one two three") == 3
+    assert first.count("one two three") == 3
+    assert inner.calls == 1
+    first.save()
+
+    second = CachedTokenCounter(inner, path)
+    assert second.count("one two three") == 3
+    assert inner.calls == 1
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_save_merges_entries_from_other_processes(tmp_path):
+    path = str(tmp_path / "prompt_tokens.json")
+    a, b = CachedTokenCounter(CountingTokenCounter(), path), CachedTokenCounter(CountingTokenCounter(), path)
+    a.count("from a")
+    b.count("from b too")
+    a.save()
+    b.save()
+    inner = CountingTokenCounter()
+    merged = CachedTokenCounter(inner, path)
+    merged.count("from a")
+    merged.count("from b too")
+    assert inner.calls == 0
+
+
+def test_counts_from_another_tokenizer_are_not_reused(tmp_path):
+    path = str(tmp_path / "prompt_tokens.json")
+    cache = CachedTokenCounter(CountingTokenCounter(), path)
+    cache.count("some prompt")
+    cache.save()
+    approximate = ApproximateTokenCounter()
+    assert CachedTokenCounter(approximate, path).count("some prompt") == approximate.count("some prompt") != 2